@@ -1,9 +1,9 @@
 import sqlite3
-import requests
 import os
-import time
 from dotenv import load_dotenv
 from tqdm import tqdm  # <--- Added import
+from scripts.db import get_pool, close_pools
+from scripts.tmdb_client import TMDBClient
 
 # --- SETUP ---
 # FIX: Since this file is in 'backend/', the DB is in the same folder.
@@ -19,10 +19,12 @@ if not TMDB_KEY:
     print("   -> Get one at https://www.themoviedb.org/settings/api")
     exit(1)
 
+TMDB = TMDBClient(TMDB_KEY)  # cached searches: re-runs only hit TMDB for films not seen before
+
 def get_db():
     # tqdm.write ensures this prints above the progress bar if it happens during execution
     # print(f"📂 Connecting to: {DB_PATH}") 
-    return sqlite3.connect(DB_PATH)
+    return get_pool(DB_PATH, read_only=False).connection()
 
 def add_column_if_missing():
     conn = get_db()
@@ -45,24 +47,14 @@ def add_column_if_missing():
         else:
             print(f"❌ DB Error: {e}")
             exit(1)
-    finally:
-        conn.close()
 
 def fetch_tmdb_rating(title, year):
-    url = "https://api.themoviedb.org/3/search/movie"
-    params = {
-        "api_key": TMDB_KEY,
-        "query": title,
-        "year": year,
-        "include_adult": "false"
-    }
-    
     try:
-        res = requests.get(url, params=params)
-        if res.status_code != 200:
+        res = TMDB.search_movie(title, year)
+        if not res.ok:
             return 0.0
             
-        data = res.json()
+        data = res.data
         if data.get("results"):
             # Return the vote average (e.g., 8.4)
             return data["results"][0]["vote_average"]
@@ -108,13 +100,12 @@ def hydrate():
         else:
             # tqdm.write(f"⚠️ No rating: {title}")
             pass
-            
-        # Sleep briefly to be nice to the API
-        time.sleep(0.1)
 
     conn.commit()
-    conn.close()
+    tmdb_stats = TMDB.stats()
+    close_pools()
     print(f"\n🎉 DONE! Updated {updated_count} movies with real community ratings.")
+    print(f"   TMDB: {tmdb_stats['cache']} cached, {tmdb_stats['network']} fetched")
 
 if __name__ == "__main__":
     hydrate()
\ No newline at end of file
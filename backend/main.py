@@ -1,15 +1,23 @@
 import os
+import hmac
 import json
 import logging
-from fastapi import FastAPI, HTTPException, Body
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Body, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
 from typing import Optional, List, Union
 from dotenv import load_dotenv
 
 # Import logic
 from scripts.generator import TitleGenerationLayer, FilmEntry
-from scripts.db import find_movie_metadata, get_simple_metadata
+from scripts.gatekeeper import QueryIntent
+from scripts.response_cache import ResponseCache
+from scripts.db import (
+    find_movie_metadata, find_movies_metadata_batch, find_movie_fuzzy, get_simple_metadata_batch,
+    load_catalog, reload_catalog, pool_stats, close_pools, run_db, CATALOG,
+)
 from scripts.utils import parse_title_and_year  # <--- IMPORT THE NEW PARSER
 
 load_dotenv()
@@ -18,7 +26,19 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("MotifAPI")
 
-app = FastAPI(title="Motif Engine API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the in-memory catalog index once; lookups never touch disk after this.
+    try:
+        load_catalog()
+    except FileNotFoundError:
+        logger.error("❌ Catalog index not loaded: movies.db missing, lookups will fail.")
+    yield
+    await layer.async_client.close()
+    layer.refresh_executor.shutdown(wait=False, cancel_futures=True)
+    close_pools()
+
+app = FastAPI(title="Motif Engine API", lifespan=lifespan)
 
 # --- CORS ---
 app.add_middleware(
@@ -31,6 +51,11 @@ app.add_middleware(
 
 layer = TitleGenerationLayer()
 
+# Serialized SearchResponse bytes per query-cache key; rewriting the
+# query-cache entry (or reloading the catalog) invalidates them.
+response_cache = ResponseCache()
+layer.cache.subscribe(response_cache.invalidate)
+
 # --- MODELS ---
 
 class MoviePalette(BaseModel):
@@ -80,10 +105,10 @@ class SearchRequest(BaseModel):
 
 # --- HELPERS ---
 
-def hydrate_similars(similar_data_str):
+def parse_similars(similar_data_str):
     """
-    Parses the 'similar_films' string (JSON or CSV), cleans titles, 
-    and grabs posters from the DB.
+    Parses the 'similar_films' string (JSON or CSV) into cleaned
+    (title, year) pairs.
     """
     raw_similars = []
     if similar_data_str:
@@ -91,15 +116,24 @@ def hydrate_similars(similar_data_str):
             raw_similars = json.loads(similar_data_str)
         except:
             raw_similars = [s.strip() for s in str(similar_data_str).split(',')]
-    
+
+    # PARSE "Title (Year)" -> "Title", Year
+    return [parse_title_and_year(raw_t) for raw_t in raw_similars]
+
+def hydrate_similars(similar_data_str, poster_lookup=None):
+    """
+    Parses the 'similar_films' string and grabs posters from the DB.
+    `poster_lookup` is a pre-fetched get_simple_metadata_batch result;
+    without it the similars of this one film are fetched in a single query.
+    """
+    parsed = parse_similars(similar_data_str)
+    if poster_lookup is None:
+        poster_lookup = get_simple_metadata_batch([clean_t for clean_t, _ in parsed])
+
     hydrated = []
-    for raw_t in raw_similars:
-        # 1. PARSE "Title (Year)" -> "Title", Year
-        clean_t, parsed_y = parse_title_and_year(raw_t)
-        
-        # 2. Check DB
-        meta = get_simple_metadata(clean_t)
-        
+    for clean_t, parsed_y in parsed:
+        meta = poster_lookup.get(clean_t.strip().lower())
+
         if meta:
             hydrated.append(SimilarFilm(
                 title=meta["title"], 
@@ -112,7 +146,7 @@ def hydrate_similars(similar_data_str):
             
     return hydrated
 
-def format_db_entry(db_data, score=None):
+def format_db_entry(db_data, score=None, poster_lookup=None):
     """Formats a DB row into our Pydantic model."""
     palette_obj = None
     if db_data.get("palette_colors"):
@@ -147,25 +181,40 @@ def format_db_entry(db_data, score=None):
         vibe_signature_val=vibe_val or 50,
         palette=palette_obj,
         # USE HELPER FUNCTION
-        similar_films=hydrate_similars(db_data.get("similar_films")),
+        similar_films=hydrate_similars(db_data.get("similar_films"), poster_lookup),
         director=db_data["director"],
         cast=db_data["cast"],
         is_unverified=False
     )
 
-# --- ENDPOINTS ---
+def unverified_entry(title, year, score):
+    """Card for an AI suggestion that is not in the archive."""
+    return EnrichedFilmEntry(
+        tmdb_id=None, 
+        title=title, 
+        year=year,
+        confidence_score=score,
+        overview="⚠️ AI Suggestion: Not in archives.",
+        runtime=0, director="Unknown", cast="",
+        community_rating=0.0,
+        poster_url=None, trailer_url=None,
+        certification="AI", primary_aesthetic="Unverified",
+        fit_quote="Suggested by neural engine.",
+        tone_label="Concept", vibe_signature_label="Potential", vibe_signature_val=50,
+        palette=None, similar_films=[], is_unverified=True
+    )
 
-@app.post("/api/search", response_model=SearchResponse) 
-def search_movies(request: SearchRequest):
-    logger.info(f"🔎 Search Request: {request.query}")
-    
-    ai_result = layer.fetch_titles(request.query)
-    enriched_results = []
-    
-    # --- DEDUPLICATION LOGIC ---
-    seen_keys = set() 
+class ResultDeduper:
+    """
+    Search dedup rules, shared by the batch and the streaming path:
+    drop repeated (title, year) signatures, then repeated archive films.
+    """
+    def __init__(self):
+        self.seen_keys = set()
+        self.seen_ids = set()
 
-    for film in ai_result.titles:
+    def admit_title(self, film: FilmEntry):
+        """Returns (clean_title, search_year), or None for a duplicate."""
         # 1. Standardize the title and year
         clean_title, parsed_year = parse_title_and_year(film.title)
         search_year = parsed_year if parsed_year else film.year
@@ -174,38 +223,149 @@ def search_movies(request: SearchRequest):
         unique_key = (clean_title.strip().lower(), search_year)
         
         # 3. Check if we've seen this signature before
-        if unique_key in seen_keys:
+        if unique_key in self.seen_keys:
             logger.warning(f"🛑 DUPLICATE CAUGHT: Dropping '{clean_title}' ({search_year})")
-            continue
+            return None
         
         # 4. Mark as seen
-        seen_keys.add(unique_key)
-        
-        # 5. Database Lookup
-        db_data = find_movie_metadata(clean_title, search_year)
-        
+        self.seen_keys.add(unique_key)
+        return clean_title, search_year
+
+    def admit_row(self, db_data, clean_title, search_year) -> bool:
+        """False when another LLM spelling (or year) already resolved to this film."""
+        if not db_data:
+            return True
+        if db_data["tmdb_id"] in self.seen_ids:
+            logger.warning(f"🛑 DUPLICATE CAUGHT: Dropping '{clean_title}' ({search_year})")
+            return False
+        self.seen_ids.add(db_data["tmdb_id"])
+        return True
+
+def fuzzy_fallback(clean_title, search_year):
+    """Fuzzy lookup for an exact miss, before it becomes an "unverified" card."""
+    db_data = find_movie_fuzzy(clean_title, search_year)
+    if db_data:
+        logger.info(f"🪄 Fuzzy match: '{clean_title}' -> '{db_data['title']}'")
+    return db_data
+
+def hydrate_results(films: List[FilmEntry]) -> List[EnrichedFilmEntry]:
+    """
+    Hydration stage for a ranked LLM title list.
+    Resolves every title and every similar film in two set-based
+    queries and keeps the LLM ranking order.
+    """
+    # --- DEDUPLICATION LOGIC ---
+    deduper = ResultDeduper()
+    candidates = []
+    for film in films:
+        admitted = deduper.admit_title(film)
+        if admitted:
+            candidates.append((*admitted, film.confidence_score))
+
+    # 5. Database Lookup (one query for all titles)
+    rows = find_movies_metadata_batch([(title, year) for title, year, _ in candidates])
+
+    # 5b. Fuzzy fallback for misses
+    for i, (clean_title, search_year, _) in enumerate(candidates):
+        if rows[i] is None:
+            rows[i] = fuzzy_fallback(clean_title, search_year)
+
+    # 6. Poster Lookup (one query for every similar film of every hit)
+    similar_titles = [
+        clean_t
+        for row in rows if row
+        for clean_t, _ in parse_similars(row.get("similar_films"))
+    ]
+    poster_lookup = get_simple_metadata_batch(similar_titles)
+
+    enriched_results = []
+    for (clean_title, search_year, score), db_data in zip(candidates, rows):
+        if not deduper.admit_row(db_data, clean_title, search_year):
+            continue
         if db_data:
-            enriched_results.append(format_db_entry(db_data, film.confidence_score))
+            enriched_results.append(format_db_entry(db_data, score, poster_lookup))
         else:
-            enriched_results.append(EnrichedFilmEntry(
-                tmdb_id=None, 
-                title=clean_title, 
-                year=search_year,
-                confidence_score=film.confidence_score,
-                overview="⚠️ AI Suggestion: Not in archives.",
-                runtime=0, director="Unknown", cast="",
-                community_rating=0.0,
-                poster_url=None, trailer_url=None,
-                certification="AI", primary_aesthetic="Unverified",
-                fit_quote="Suggested by neural engine.",
-                tone_label="Concept", vibe_signature_label="Potential", vibe_signature_val=50,
-                palette=None, similar_films=[], is_unverified=True
-            ))
+            enriched_results.append(unverified_entry(clean_title, search_year, score))
+
+    return enriched_results
+
+def lookup_film(clean_title, search_year):
+    """Exact-then-fuzzy lookup for one streamed title (runs on the DB executor)."""
+    return find_movie_metadata(clean_title, search_year) or fuzzy_fallback(clean_title, search_year)
+
+async def stream_search(query: str):
+    """NDJSON body of /api/search/stream: one EnrichedFilmEntry per line."""
+    films = layer.astream_titles(query)
+    deduper = ResultDeduper()
+    try:
+        async for film in films:
+            entry = await emit_entry(film, deduper)
+            if entry:
+                yield entry
+    finally:
+        await films.aclose()
+
+async def emit_entry(film: FilmEntry, deduper: ResultDeduper):
+    """Dedups and hydrates one streamed title into an NDJSON line (None if dropped)."""
+    admitted = deduper.admit_title(film)
+    if not admitted:
+        return None
+    clean_title, search_year = admitted
+
+    db_data = await run_db(lookup_film, clean_title, search_year)
+    if not deduper.admit_row(db_data, clean_title, search_year):
+        return None
+
+    if db_data:
+        entry = await run_db(format_db_entry, db_data, film.confidence_score)
+    else:
+        entry = unverified_entry(clean_title, search_year, film.confidence_score)
+    return entry.model_dump_json() + "\n"
+
+# --- ENDPOINTS ---
+
+@app.post("/api/search", response_model=SearchResponse) 
+async def search_movies(request: SearchRequest):
+    logger.info(f"🔎 Search Request: {request.query}")
+
+    # 0. Hydrated response tier: a repeat query is one dict lookup + a byte write
+    processed = layer.intel.preprocess(request.query)
+    response_key = None
+    if processed.intent == QueryIntent.VALID_INTENT:
+        response_key = layer._get_cache_key(processed.normalized_text)
+        body = response_cache.get(response_key, CATALOG.version)
+        if body is not None:
+            logger.info(f"⚡ Response Cache Hit: '{processed.normalized_text}'")
+            return Response(content=body, media_type="application/json")
+
+    catalog_version = CATALOG.version
+    ai_result = await layer.afetch_titles(request.query)
+    enriched_results = await run_db(hydrate_results, ai_result.titles)
     
-    return SearchResponse(count=len(enriched_results), results=enriched_results)
+    body = SearchResponse(count=len(enriched_results), results=enriched_results).model_dump_json().encode()
+    if response_key and not ai_result.from_fallback:
+        response_cache.put(response_key, catalog_version, body)
+    return Response(content=body, media_type="application/json")
+
+@app.post("/api/search/stream")
+async def search_movies_stream(request: SearchRequest):
+    """
+    Progressive /api/search: newline-delimited EnrichedFilmEntry objects,
+    each sent as soon as its title is parsed from the stream and hydrated.
+    """
+    logger.info(f"🔎 Stream Search Request: {request.query}")
+    return StreamingResponse(stream_search(request.query), media_type="application/x-ndjson")
+
+def lookup_single_movie(query_title, query_year):
+    """Blocking half of /api/get_movie (runs on the DB executor)."""
+    db_data = find_movie_metadata(query_title, query_year) 
+
+    if db_data:
+        return format_db_entry(db_data, 100) # 100% score for direct lookups
+    return None
 
 @app.post("/api/get_movie", response_model=EnrichedFilmEntry)
-def get_single_movie(request: dict = Body(...)):
+async def get_single_movie(request: dict = Body(...)):
     raw_query = request.get("query")
     
     # 1. PARSE THE CLICKED STRING
@@ -215,10 +375,10 @@ def get_single_movie(request: dict = Body(...)):
     logger.info(f"⚡ Smart Lookup: Raw='{raw_query}' -> Parsed='{query_title}' ({query_year})")
 
     # 2. STRICT DB LOOKUP
-    db_data = find_movie_metadata(query_title, query_year) 
+    entry = await run_db(lookup_single_movie, query_title, query_year)
 
-    if db_data:
-        return format_db_entry(db_data, 100) # 100% score for direct lookups
+    if entry:
+        return entry
 
     # 3. FALLBACK: NOT FOUND
     # The frontend will likely show a toast or handle this gracefully
@@ -232,15 +392,11 @@ def get_single_movie(request: dict = Body(...)):
     )
 
 @app.get("/explain", response_model=ContextResponse)
-def explain_movie(title: str, query: str):
-    from openai import OpenAI
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
+async def explain_movie(title: str, query: str):
     prompt = f"Explain why '{title}' fits '{query}' in 20 words (bro style)."
     try:
-        resp = client.chat.completions.create(
+        # Reuses the layer's pooled async OpenRouter client
+        resp = await layer.async_client.chat.completions.create(
             model="xiaomi/mimo-v2-flash:free",
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"},
@@ -250,6 +406,41 @@ def explain_movie(title: str, query: str):
     except:
         return ContextResponse(fit_quote="Vibes match.", social_context="Universal")
 
+# --- ADMIN ---
+# Admin endpoints are off unless MOTIF_ADMIN_TOKEN is set; callers send it as X-Admin-Token.
+ADMIN_TOKEN = os.getenv("MOTIF_ADMIN_TOKEN")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/api/admin/reload_catalog", dependencies=[Depends(require_admin)])
+async def reload_catalog_index():
+    """Rebuilds the catalog index after enrichment has written new rows."""
+    films = await run_db(reload_catalog)
+    return CATALOG.stats() | {"reloaded": films}
+
+@app.get("/api/stats")
+def engine_stats():
+    """Runtime counters for monitoring."""
+    return {
+        "catalog": CATALOG.stats(),
+        "db_pools": pool_stats(),
+        "query_cache": layer.cache.stats(),
+        "query_canonicalizer": layer.canonicalizer.stats(),
+        "semantic_cache": layer.semantic.stats() if layer.semantic else None,
+        "llm_single_flight": layer.flights.stats(),
+        "stale_revalidation": layer.revalidation_stats(),
+        "negative_cache": layer.negative.stats(),
+        "llm_usage": dict(layer.usage),
+        "llm_hedging": layer.hedging_stats(),
+        "circuit_breakers": layer.breaker_stats(),
+        "response_cache": response_cache.stats(),
+        "moderation": layer.intel.moderation_stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,49 +1,48 @@
-import sqlite3
-import requests
 import json
 import os
-import time
 import pandas as pd
 from tqdm import tqdm
 from dotenv import load_dotenv
 import enrich_logic
+from db import get_pool, BatchWriter
+from tmdb_client import TMDBClient
 
 load_dotenv()
 TMDB_API_KEY = os.getenv("TMDB_API_KEY")
+TMDB = TMDBClient(TMDB_API_KEY)  # cached + rate-limited, so re-runs skip the network
 DB_NAME = "motif_core.db"
 CSV_PATH = "data/cleaned_movies.csv"
 
 # --- DATABASE INIT ---
+def get_db():
+    # One persistent WAL connection per thread instead of a connect/close per film.
+    return get_pool(DB_NAME, read_only=False).connection()
+
+# Buffered writes: one transaction per batch of films instead of a commit per film
+WRITER = BatchWriter(DB_NAME)
+
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_db()
     with open("schema.sql", "r") as f:
         conn.executescript(f.read())
-    conn.close()
 
 def movie_exists(movie_id):
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
+    cur = get_db().cursor()
     cur.execute("SELECT 1 FROM movies WHERE movie_id = ?", (movie_id,))
-    exists = cur.fetchone() is not None
-    conn.close()
-    return exists
+    return cur.fetchone() is not None
 
 # --- FETCHING ---
 def fetch_tmdb_details(movie_id):
-    url = f"https://api.themoviedb.org/3/movie/{movie_id}?api_key={TMDB_API_KEY}&append_to_response=credits,videos"
     try:
-        r = requests.get(url, timeout=5)
-        return r.json() if r.status_code == 200 else None
-    except:
+        r = TMDB.movie(movie_id, append_to_response="credits,videos")
+        return r.data if r.ok else None
+    except Exception:
         return None
 
 def save_raw_to_db(data):
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    
     # Save Movie
     trailer = next((v['key'] for v in data.get('videos', {}).get('results', []) if v['site']=='YouTube' and v['type']=='Trailer'), "")
-    cur.execute("""
+    WRITER.add("""
         INSERT OR REPLACE INTO movies (movie_id, title, overview, release_date, popularity, poster_url, trailer_url, production_companies_str)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
     """, (
@@ -54,16 +53,15 @@ def save_raw_to_db(data):
     ))
     
     # Save Cast (Top 8)
-    for m in data.get('credits', {}).get('cast', [])[:8]:
-        cur.execute("INSERT OR IGNORE INTO people (person_id, name) VALUES (?, ?)", (m['id'], m['name']))
-        cur.execute("INSERT OR REPLACE INTO credits (movie_id, person_id, job) VALUES (?, ?, ?)", (data['id'], m['id'], "Actor"))
-    
-    conn.commit()
-    conn.close()
+    cast = data.get('credits', {}).get('cast', [])[:8]
+    WRITER.add_many("INSERT OR IGNORE INTO people (person_id, name) VALUES (?, ?)",
+                    [(m['id'], m['name']) for m in cast])
+    WRITER.add_many("INSERT OR REPLACE INTO credits (movie_id, person_id, job) VALUES (?, ?, ?)",
+                    [(data['id'], m['id'], "Actor") for m in cast])
 
 def save_ai_enriched(movie_id, ai_data):
-    conn = sqlite3.connect(DB_NAME)
-    conn.execute("""
+    # Runs after the movie's INSERT: the writer keeps the order statements were added in
+    WRITER.add("""
         UPDATE movies SET 
         primary_aesthetic=?, fit_quote=?, social_friction=?, 
         focus_load=?, tone_label=?, emotional_aftertaste=?, 
@@ -75,8 +73,6 @@ def save_ai_enriched(movie_id, ai_data):
         ai_data.get('perfect_occasion'), json.dumps(ai_data.get('similar_films', [])),
         movie_id
     ))
-    conn.commit()
-    conn.close()
 
 # --- MAIN LOADER ---
 if __name__ == "__main__":
@@ -115,11 +111,9 @@ if __name__ == "__main__":
                 if ai_data:
                     save_ai_enriched(mid, ai_data)
             
-            # 0.1s delay to be nice to TMDB API
-            time.sleep(0.1) 
-            
         except Exception as e:
             print(f"⚠️ Error on ID {mid}: {e}")
             continue
 
-    print("✅ Batch Loading Complete!")
\ No newline at end of file
+    WRITER.close()
+    print(f"✅ Batch Loading Complete! ({WRITER.stats()['rows_written']} rows in {WRITER.stats()['flushes']} transactions)")
\ No newline at end of file
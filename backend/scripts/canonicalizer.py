@@ -0,0 +1,102 @@
+from typing import List
+
+# --- CONFIG ---
+# Filler that doesn't change what the user is asking for. Kept short on
+# purpose: articles and small words are part of real titles ("about time",
+# "the truman show", "some like it hot"), so they stay in the key.
+STOPWORDS = frozenset([
+    "movie", "movies", "film", "films", "flick", "flicks",
+    "recommend", "recommendations", "suggest", "suggestions", "please",
+])
+# Plurals whose singular is a different word or a different film
+NO_STEM = frozenset(["news", "series", "species", "aliens", "politics", "physics"])
+# Compound words people split ("grind set" -> "grindset"). Fixed on purpose:
+# keys must not depend on anything learned at runtime, or the same query gets
+# different keys across restarts and workers and orphans its cache entries.
+# Typos are left to the semantic cache, which matches near-duplicates without
+# changing keys (spell-correcting into a mined vocabulary turned "fight" into
+# "night" and "spice" into "space").
+COMPOUND_VOCABULARY = frozenset([
+    "sigma", "grindset", "coquette", "doomer", "femcel", "corecore", "liminal",
+    "girlboss", "academia", "unhinged", "synthwave", "cyberpunk", "vaporwave",
+    "cottagecore", "goblincore", "bimbocore", "nostalgia", "melancholy",
+])
+
+def _stem(token: str) -> str:
+    """Light plural stripping only; anything smarter merges unrelated queries."""
+    if len(token) <= 4 or token in NO_STEM or token.endswith(("ss", "us", "is")):
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("ches", "shes", "xes")):
+        return token[:-2]
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+class QueryCanonicalizer:
+    """
+    Maps normalized queries that ask for the same thing onto one cache key:
+    "sigma grindset movies", "sigma grindset films" and "sigma grind set"
+    all become "sigma grindset". Word order is kept ("love without romance"
+    is not "romance without love"). Only used for keys; the LLM still sees
+    the user's own wording. A pure function of the text: no state feeds
+    into the key, so every process computes the same one.
+    """
+    def __init__(self):
+        self.joins = 0
+        # Cache lookups, split by whether the plain normalized key would have hit too
+        self.lookups = 0
+        self.raw_hits = 0
+        self.canonical_hits = 0
+
+    # --- CANONICALIZATION ---
+
+    def canonicalize(self, normalized_text: str) -> str:
+        tokens = self._join_compounds(normalized_text.split())
+        kept = [_stem(t) for t in tokens if t not in STOPWORDS]
+        if not kept:
+            # "the movies" is still a query; don't collapse it to an empty key
+            kept = tokens
+        return " ".join(kept)
+
+    def _join_compounds(self, tokens: List[str]) -> List[str]:
+        """Joins split words ("grind set" -> "grindset") when the joined form is a known compound."""
+        joined = []
+        i = 0
+        while i < len(tokens):
+            if i + 1 < len(tokens) and tokens[i] + tokens[i + 1] in COMPOUND_VOCABULARY:
+                joined.append(tokens[i] + tokens[i + 1])
+                self.joins += 1
+                i += 2
+                continue
+            joined.append(tokens[i])
+            i += 1
+        return joined
+
+    # --- ANALYTICS ---
+
+    def record_lookup(self, normalized_text: str, cached_query: str = None):
+        """
+        Counts one cache lookup. cached_query is the stored query text of the
+        hit (None on a miss); a hit whose stored text differs from this query
+        is one LLM call the canonical key saved.
+        """
+        self.lookups += 1
+        if cached_query is None:
+            return
+        if cached_query == normalized_text:
+            self.raw_hits += 1
+        else:
+            self.canonical_hits += 1
+
+    def stats(self) -> dict:
+        hits = self.raw_hits + self.canonical_hits
+        return {
+            "joins": self.joins,
+            "lookups": self.lookups,
+            "raw_hits": self.raw_hits,
+            "canonical_only_hits": self.canonical_hits,
+            "raw_hit_rate": round(self.raw_hits / self.lookups, 4) if self.lookups else 0.0,
+            "canonical_hit_rate": round(hits / self.lookups, 4) if self.lookups else 0.0,
+        }
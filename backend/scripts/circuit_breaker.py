@@ -0,0 +1,111 @@
+import os
+import time
+import threading
+from collections import deque
+
+# --- CONFIG ---
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))                  # recent calls considered
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))             # before the rate means anything
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))   # failed or slow share that opens it
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "15"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))    # cool-down before probing
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+class CircuitBreaker:
+    """
+    Per-endpoint breaker. Closed: calls go through and their outcome is
+    recorded; failures and calls slower than slow_call_seconds both count
+    as bad. Once the bad share of the last `window` calls reaches
+    failure_rate, the circuit opens and allow() refuses instantly. After
+    open_seconds it goes half-open and lets a few probes through; a good
+    probe closes it, a bad one re-opens it.
+    Thread-safe: shared by the sync scripts path and the event loop.
+    """
+    def __init__(self, name: str, window: int = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 failure_rate: float = BREAKER_FAILURE_RATE, slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+                 open_seconds: float = BREAKER_OPEN_SECONDS, half_open_probes: int = BREAKER_HALF_OPEN_PROBES):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._outcomes = deque(maxlen=window)   # True = bad (failed or slow)
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probes_in_flight = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """True if a call may go out now (and, when half-open, reserves a probe slot)."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self.rejected += 1
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def record_success(self, latency: float):
+        self._record(latency > self.slow_call_seconds)
+
+    def record_failure(self):
+        self._record(True)
+
+    def release(self):
+        """The call was abandoned (e.g. cancelled as a hedge loser); frees a probe slot without a verdict."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def _record(self, bad: bool):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if bad:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                return
+            if self.state == OPEN:
+                return  # late result of a call started before the circuit opened
+
+            self._outcomes.append(bad)
+            if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._outcomes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            outcomes = list(self._outcomes)
+            state = self.state
+            retry_in = max(0.0, self.open_seconds - (time.monotonic() - self.opened_at)) if state == OPEN else 0.0
+        return {
+            "state": state,
+            "recent_calls": len(outcomes),
+            "recent_bad_rate": round(sum(outcomes) / len(outcomes), 4) if outcomes else 0.0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in_s": round(retry_in, 1),
+        }
@@ -0,0 +1,19 @@
+# Archetype vocabulary shared by the RAG builder and the cache warmer.
+ARCHETYPES = ['Sigma', 'Coquette', 'Doomer', 'Femcel', 'Dark Academia',
+              'Golden Retriever', 'Unhinged', 'Corecore', 'Literally Me',
+              'Good For Her', 'Liminal', 'Girlboss', 'Manic Pixie']
+
+def extract_archetype(vibe_text):
+    """Extract primary archetype from vibe text for structured search"""
+    vibe_lower = vibe_text.lower()
+    for archetype in ARCHETYPES:
+        if archetype.lower() in vibe_lower:
+            return archetype
+
+    # Fallback to vibe-based inference
+    if 'lonely' in vibe_lower or 'isolated' in vibe_lower:
+        return 'Doomer'
+    elif 'aesthetic' in vibe_lower or 'vibe' in vibe_lower:
+        return 'Liminal'
+    else:
+        return 'Film'
@@ -1,7 +1,21 @@
 import sqlite3
 import os
+import time
+import atexit
+import asyncio
 import logging
-from typing import Optional
+import threading
+from dataclasses import dataclass, field
+from itertools import groupby
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Tuple, Iterable
+
+# db.py is imported as `scripts.db` by the API and as plain `db` by the loaders.
+try:
+    from scripts.fuzzy import TrigramIndex
+except ImportError:
+    from fuzzy import TrigramIndex
 
 # --- PATH SETUP ---
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -9,61 +23,515 @@ BACKEND_DIR = os.path.dirname(CURRENT_DIR)
 DB_PATH = os.path.join(BACKEND_DIR, "movies.db")
 LOG_PATH = os.path.join(BACKEND_DIR, "db_activity.log")
 
+# Keeps each VALUES list well under SQLite's bound-parameter limit.
+BATCH_CHUNK_SIZE = 250
+
+# Release dates drift by a year between festivals, regions and TMDB.
+YEAR_TOLERANCE = 1
+NORM_TITLE_INDEX = "idx_movies_norm_title_year"
+
 # --- LOGGING ---
-logging.basicConfig(
-    filename=LOG_PATH,
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filemode='a' 
-)
+# Only this module's logger writes to db_activity.log. basicConfig here would
+# claim the root logger for whichever process imports db first and send the
+# API's and engine's logs to the file instead of stderr.
 logger = logging.getLogger("DB_Logger")
+logger.setLevel(logging.INFO)
+if not any(isinstance(h, logging.FileHandler) for h in logger.handlers):
+    _file_handler = logging.FileHandler(LOG_PATH, mode='a')
+    _file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logger.addHandler(_file_handler)
+
+# --- CONNECTION POOL ---
+# Connections are persistent (one per thread, per file) so SQLite's page
+# cache and the prepared-statement cache survive between requests.
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024      # bytes mapped straight from the file
+SQLITE_CACHE_SIZE = -64 * 1024            # negative = KiB, so 64 MiB page cache
+SQLITE_BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256                # sqlite3's per-connection prepared statements
+
+class ConnectionPool:
+    """
+    Thread-local pool of tuned connections to one SQLite file.
+    Read-only pools set `query_only`, so a stray write fails loudly
+    instead of taking the writer lock under the API threadpool.
+    """
+    def __init__(self, db_path: str, read_only: bool = True):
+        self.db_path = db_path
+        self.read_only = read_only
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._wal_checked = False
+        self.opened = 0
+        self.checkouts = 0
+        self.closed = 0
+
+    def _ensure_wal(self):
+        # journal_mode is persistent in the file, but can only be set by a
+        # connection that is allowed to write. Do it once per pool.
+        if self._wal_checked:
+            return
+        with self._lock:
+            if self._wal_checked:
+                return
+            conn = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.OperationalError as e:
+                logger.warning(f"⚠️ Could not enable WAL on {self.db_path}: {e}")
+            finally:
+                conn.close()
+            self._wal_checked = True
+
+    def _open(self) -> sqlite3.Connection:
+        if self.read_only and not os.path.exists(self.db_path):
+            msg = f"❌ CRITICAL ERROR: Database file not found at: {self.db_path}"
+            print(msg)
+            logger.critical(msg)
+            raise FileNotFoundError(f"Database missing: {self.db_path}")
+
+        self._ensure_wal()
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            # Only the owning thread uses it; close_all() may run on another.
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        if self.read_only:
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._lock:
+            self._connections.append(conn)
+            self.opened += 1
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Returns this thread's connection, opening it on first use. Do not close it."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        self.checkouts += 1
+        return conn
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                    self.closed += 1
+                except Exception:
+                    pass
+            self._connections.clear()
+            # Threads holding a stale handle reopen on their next checkout.
+            self._local = threading.local()
+
+    def stats(self) -> dict:
+        return {
+            "path": self.db_path,
+            "read_only": self.read_only,
+            "open_connections": len(self._connections),
+            "opened": self.opened,
+            "closed": self.closed,
+            "checkouts": self.checkouts,
+            "reuse_ratio": round(1 - self.opened / self.checkouts, 4) if self.checkouts else 0.0,
+        }
+
+_POOLS: dict = {}
+_POOLS_LOCK = threading.Lock()
+
+def get_pool(db_path: str = DB_PATH, read_only: bool = True) -> ConnectionPool:
+    """Shared pool per (file, mode). Every module goes through here instead of sqlite3.connect."""
+    key = (os.path.abspath(db_path), read_only)
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.setdefault(key, ConnectionPool(db_path, read_only))
+    return pool
+
+def pool_stats() -> List[dict]:
+    return [pool.stats() for pool in list(_POOLS.values())]
+
+def close_pools():
+    for pool in list(_POOLS.values()):
+        pool.close_all()
 
 def get_db_connection():
-    if not os.path.exists(DB_PATH):
-        msg = f"❌ CRITICAL ERROR: Database file not found at: {DB_PATH}"
-        print(msg)
-        logger.critical(msg)
-        raise FileNotFoundError(f"Database missing: {DB_PATH}")
-    
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Pooled read-only connection to movies.db for the current thread."""
+    return get_pool(DB_PATH).connection()
+
+# --- DB EXECUTOR ---
+# Async endpoints hand blocking SQLite work to this small dedicated pool,
+# so slow LLM calls never compete with hydration for Starlette's threadpool.
+# Few threads = few pooled connections, each with a warm page cache.
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="motif-db")
+
+async def run_db(fn, *args):
+    """Runs a blocking DB function on DB_EXECUTOR from async code."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, fn, *args)
+
+# --- BATCHED WRITER ---
+# Loaders used to commit after every film: one fsync each. BatchWriter
+# buffers statements and flushes them with executemany in one transaction.
+WRITER_FLUSH_ROWS = int(os.getenv("DB_WRITER_FLUSH_ROWS", "200"))
+WRITER_FLUSH_SECONDS = float(os.getenv("DB_WRITER_FLUSH_SECONDS", "2.0"))
+
+class BatchWriter:
+    """
+    Buffers write statements for one SQLite file (WAL, synchronous=NORMAL
+    via the write pool) and flushes every `flush_rows` rows or
+    `flush_seconds` seconds, whichever comes first, in one transaction.
+    Statements run in the order they were added; consecutive rows of the
+    same SQL go through one executemany, so INSERT movie -> INSERT credits
+    -> UPDATE movie holds across films and across flush boundaries.
+    close() (also run at exit and by `with`) flushes what is left.
+    """
+    def __init__(self, db_path: str, flush_rows: int = WRITER_FLUSH_ROWS,
+                 flush_seconds: float = WRITER_FLUSH_SECONDS):
+        self.pool = get_pool(db_path, read_only=False)
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._buffer: list = []     # (sql, params), in the order added
+        self._pending = 0
+        self._oldest = 0.0
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.flushes = 0
+        self.flush_time = 0.0
+        self._timer = threading.Thread(target=self._flush_idle, name="db-batch-writer", daemon=True)
+        self._timer.start()
+        atexit.register(self.close)
+
+    def add(self, sql: str, params: tuple):
+        self.add_group([(sql, params)])
+
+    def add_many(self, sql: str, rows: List[tuple]):
+        self.add_group([(sql, params) for params in rows])
+
+    def add_group(self, statements: List[Tuple[str, tuple]]):
+        """
+        Buffers (sql, params) pairs as one unit: no flush can fall between
+        them, so they always commit in the same transaction.
+        """
+        if not statements:
+            return
+        if self._closed.is_set():
+            raise RuntimeError("BatchWriter is closed")
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._buffer.extend(statements)
+            self._pending += len(statements)
+            if self._pending >= self.flush_rows:
+                self.flush()
+
+    def flush(self) -> int:
+        """Writes everything buffered in one transaction; returns the row count."""
+        with self._lock:
+            if not self._pending:
+                return 0
+            buffer, pending = self._buffer, self._pending
+            self._buffer, self._pending = [], 0
+
+            start = time.perf_counter()
+            conn = self.pool.connection()
+            try:
+                with conn:  # BEGIN ... COMMIT, or ROLLBACK on error
+                    for sql, run in groupby(buffer, key=itemgetter(0)):
+                        conn.executemany(sql, [params for _, params in run])
+                self.rows_written += pending
+            except sqlite3.Error as e:
+                self.rows_failed += pending
+                logger.error(f"❌ Batch write of {pending} rows to {self.pool.db_path} failed: {e}")
+                raise
+            finally:
+                self.flushes += 1
+                self.flush_time += time.perf_counter() - start
+            return pending
+
+    def _flush_idle(self):
+        # Rows that trickle in slowly (e.g. behind Ollama) still land within flush_seconds
+        while not self._closed.wait(self.flush_seconds / 2):
+            with self._lock:
+                due = self._pending and time.monotonic() - self._oldest >= self.flush_seconds
+            if due:
+                try:
+                    self.flush()
+                except sqlite3.Error:
+                    pass  # already logged and counted
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> dict:
+        return {
+            "path": self.pool.db_path,
+            "pending": self._pending,
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "flushes": self.flushes,
+            "avg_rows_per_flush": round(self.rows_written / self.flushes, 1) if self.flushes else 0.0,
+            "flush_time_s": round(self.flush_time, 3),
+        }
+
+# --- IN-MEMORY CATALOG INDEX ---
+
+def normalize_title(title) -> str:
+    """Lowercases and collapses whitespace: the key every catalog lookup uses."""
+    return " ".join(str(title).lower().split())
+
+def year_candidates(year: int) -> List[int]:
+    """Exact year first, then the earlier neighbour, then the later one."""
+    years = [year]
+    for delta in range(1, YEAR_TOLERANCE + 1):
+        years.extend((year - delta, year + delta))
+    return years
+
+# --- SCHEMA MIGRATION ---
+_SCHEMA_READY = set()
+
+def migrate_schema(db_path: str = DB_PATH) -> int:
+    """
+    Adds the stored `norm_title` column and the composite
+    (norm_title, year) index, then backfills rows that lack it.
+    Idempotent; returns the number of rows backfilled.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database missing: {db_path}")
+
+    conn = get_pool(db_path, read_only=False).connection()
+    columns = {r["name"] for r in conn.execute("PRAGMA table_info(movies)")}
+    if not columns:
+        logger.error(f"❌ No 'movies' table in {db_path}, skipping migration.")
+        return 0
+
+    conn.create_function("motif_norm_title", 1, normalize_title, deterministic=True)
+    with conn:
+        if "norm_title" not in columns:
+            logger.info(f"🛠️ Adding norm_title column to {db_path}")
+            conn.execute("ALTER TABLE movies ADD COLUMN norm_title TEXT")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {NORM_TITLE_INDEX} ON movies(norm_title, year)")
+        cursor = conn.execute(
+            "UPDATE movies SET norm_title = motif_norm_title(title) "
+            "WHERE norm_title IS NULL AND title IS NOT NULL"
+        )
+
+    _SCHEMA_READY.add(os.path.abspath(db_path))
+    if cursor.rowcount:
+        logger.info(f"🛠️ Backfilled norm_title for {cursor.rowcount} rows")
+    return cursor.rowcount
+
+def ensure_schema(db_path: str = DB_PATH):
+    """Runs the migration once per process before the first SQL lookup."""
+    if os.path.abspath(db_path) not in _SCHEMA_READY:
+        migrate_schema(db_path)
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """One immutable build of the catalog index; a reload makes a new one."""
+    columns: Tuple[str, ...] = ()
+    rows: Tuple[tuple, ...] = ()
+    by_key: dict = field(default_factory=dict)      # (norm_title, year) -> row position
+    by_title: dict = field(default_factory=dict)    # norm_title -> first row position
+    simple_pos: Tuple[int, ...] = ()
+    fuzzy: TrigramIndex = field(default_factory=TrigramIndex)
+    fuzzy_pos: Tuple[int, ...] = ()                 # fuzzy title id -> row position
+    version: int = 0
+    loaded_at: Optional[float] = None
+
+    def row(self, pos: Optional[int]) -> Optional[dict]:
+        if pos is None:
+            return None
+        return dict(zip(self.columns, self.rows[pos]))
+
+    def find(self, norm: str, year: Optional[int]) -> Optional[dict]:
+        if year and year > 1900:
+            for candidate in year_candidates(year):
+                pos = self.by_key.get((norm, candidate))
+                if pos is not None:
+                    return self.row(pos)
+            return None
+        return self.row(self.by_title.get(norm))
+
+class CatalogIndex:
+    """
+    Read-only hash index over movies.db, built once at startup.
+    Rows are kept as tuples (one shared column list) and the two maps
+    only hold row positions, so the whole catalog stays compact.
+    Everything lives in one CatalogSnapshot: load() builds a new one and
+    swaps the single reference, and each lookup reads that reference once,
+    so a reload during traffic never mixes the old and new index.
+    """
+    SIMPLE_COLUMNS = ("title", "year", "poster_url")
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self._snapshot = CatalogSnapshot()
+        self._lock = threading.Lock()   # one rebuild at a time; readers never take it
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot.loaded_at is not None
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def load(self) -> int:
+        """(Re)builds the index from disk and swaps it in. Returns the row count."""
+        with self._lock:
+            start = time.perf_counter()
+            conn = get_pool(self.db_path).connection()
+            cursor = conn.execute("SELECT * FROM movies ORDER BY rowid")
+            columns = tuple(d[0] for d in cursor.description)
+            rows = tuple(tuple(r) for r in cursor.fetchall())
+
+            title_pos = columns.index("title")
+            year_pos = columns.index("year")
+            by_key, by_title = {}, {}
+            for pos, row in enumerate(rows):
+                norm = normalize_title(row[title_pos])
+                # First row wins, same as fetchone() on the old SQL lookup.
+                by_key.setdefault((norm, row[year_pos]), pos)
+                by_title.setdefault(norm, pos)
+
+            snapshot = CatalogSnapshot(
+                columns=columns,
+                rows=rows,
+                by_key=by_key,
+                by_title=by_title,
+                simple_pos=tuple(columns.index(c) for c in self.SIMPLE_COLUMNS),
+                fuzzy=TrigramIndex().build(by_title.keys()),
+                fuzzy_pos=tuple(by_title.values()),
+                version=self._snapshot.version + 1,
+                loaded_at=time.time(),
+            )
+            self._snapshot = snapshot
+
+            msg = f"📚 Catalog index v{snapshot.version}: {len(rows)} films in {(time.perf_counter() - start) * 1000:.1f}ms"
+            print(msg)
+            logger.info(msg)
+            return len(rows)
+
+    def find(self, title: str, year: Optional[int] = None) -> Optional[dict]:
+        return self._snapshot.find(normalize_title(title), year)
+
+    def find_many(self, keys: List[Tuple[str, Optional[int]]]) -> List[Optional[dict]]:
+        snap = self._snapshot
+        return [snap.find(normalize_title(title), year) for title, year in keys]
+
+    def find_fuzzy(self, title: str, year: Optional[int] = None) -> Optional[dict]:
+        """
+        Best fuzzy title match above the index threshold.
+        With a real year, only a match within YEAR_TOLERANCE is accepted.
+        """
+        snap = self._snapshot
+        for title_id, _score in snap.fuzzy.search(normalize_title(title)):
+            row = snap.row(snap.fuzzy_pos[title_id])
+            if year and year > 1900:
+                row = snap.find(normalize_title(row["title"]), year)
+            if row:
+                return row
+        return None
+
+    def find_simple(self, title: str) -> Optional[dict]:
+        return self.find_simple_many([title]).get(title)
+
+    def find_simple_many(self, titles: List[str]) -> dict:
+        """{title: {title, year, poster_url}} for every title found, from one snapshot."""
+        snap = self._snapshot
+        found = {}
+        for title in titles:
+            pos = snap.by_title.get(normalize_title(title))
+            if pos is not None:
+                row = snap.rows[pos]
+                found[title] = {col: row[i] for col, i in zip(self.SIMPLE_COLUMNS, snap.simple_pos)}
+        return found
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "version": snap.version,
+            "films": len(snap.rows),
+            "keys": len(snap.by_key),
+            "titles": len(snap.by_title),
+            "loaded_at": snap.loaded_at,
+            "fuzzy": snap.fuzzy.stats(),
+        }
+
+CATALOG = CatalogIndex()
+
+def load_catalog() -> int:
+    """Migrates movies.db and builds the in-memory catalog index. Called once at API startup."""
+    migrate_schema()
+    return CATALOG.load()
+
+def reload_catalog() -> int:
+    """Explicit refresh hook for when enrichment has written new rows."""
+    migrate_schema()
+    return CATALOG.load()
 
 def find_movie_metadata(title: str, year: Optional[int] = None) -> Optional[dict]:
     """
     Strict Database Lookup.
+    Answers from the in-memory catalog index once it is loaded.
     """
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+    if CATALOG.is_loaded:
+        return CATALOG.find(title, year)
 
-        clean_title = str(title).strip()
+    try:
+        ensure_schema()
+        cursor = get_db_connection().cursor()
+        norm = normalize_title(title)
         
         if year and year > 1900:
-            # STRICT: Title must match AND Year must be exact (or +/- 1 for release date variance)
+            # One indexed range probe on (norm_title, year): +/- YEAR_TOLERANCE, nearest year first
             query = """
                 SELECT * FROM movies 
-                WHERE LOWER(TRIM(title)) = LOWER(?) 
-                AND year = ?
+                WHERE norm_title = ? 
+                AND year BETWEEN ? AND ?
+                ORDER BY ABS(year - ?), year
+                LIMIT 1
             """
-            cursor.execute(query, (clean_title, year))
+            cursor.execute(query, (norm, year - YEAR_TOLERANCE, year + YEAR_TOLERANCE, year))
         else:
             # TITLE ONLY: Only if we truly don't have a year.
             query = """
                 SELECT * FROM movies 
-                WHERE LOWER(TRIM(title)) = LOWER(?)
+                WHERE norm_title = ?
+                ORDER BY rowid
+                LIMIT 1
             """
-            cursor.execute(query, (clean_title,))
+            cursor.execute(query, (norm,))
 
         row = cursor.fetchone()
-        conn.close()
 
         if row:
-            # msg = f"✅ HIT: '{clean_title}' ({year})"
+            # msg = f"✅ HIT: '{title}' ({year})"
             # print(msg) # Optional: comment out to reduce console noise
             return dict(row)
         else:
-            # msg = f"⚠️ MISS: '{clean_title}' ({year})"
+            # msg = f"⚠️ MISS: '{title}' ({year})"
             # print(msg)
             return None
 
@@ -73,17 +541,122 @@ def find_movie_metadata(title: str, year: Optional[int] = None) -> Optional[dict
         logger.error(err_msg)
         return None
 
+def find_movie_fuzzy(title: str, year: Optional[int] = None) -> Optional[dict]:
+    """
+    Fuzzy fallback for when the exact lookup misses (typos, punctuation,
+    subtitles). Needs the catalog index; returns None until it is loaded.
+    """
+    if not CATALOG.is_loaded:
+        return None
+    return CATALOG.find_fuzzy(title, year)
+
 def get_simple_metadata(title: str) -> Optional[dict]:
     """
     Quick lookup for poster URL.
     """
+    if CATALOG.is_loaded:
+        return CATALOG.find_simple(title)
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        query = "SELECT title, year, poster_url FROM movies WHERE LOWER(TRIM(title)) = LOWER(?)"
-        cursor.execute(query, (title.strip(),))
+        ensure_schema()
+        cursor = get_db_connection().cursor()
+        query = "SELECT title, year, poster_url FROM movies WHERE norm_title = ? ORDER BY rowid LIMIT 1"
+        cursor.execute(query, (normalize_title(title),))
         row = cursor.fetchone()
-        conn.close()
         return dict(row) if row else None
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+def _chunked(items: list, size: int = BATCH_CHUNK_SIZE) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def find_movies_metadata_batch(keys: List[Tuple[str, Optional[int]]]) -> List[Optional[dict]]:
+    """
+    Set-based version of find_movie_metadata.
+    Resolves every (title, year) key in one query per chunk and returns
+    the rows in the same order as `keys` (None for a miss).
+    """
+    results: List[Optional[dict]] = [None] * len(keys)
+    if not keys:
+        return results
+
+    if CATALOG.is_loaded:
+        return CATALOG.find_many(keys)
+
+    try:
+        ensure_schema()
+        cursor = get_db_connection().cursor()
+        indexed = list(enumerate(keys))
+
+        for chunk in _chunked(indexed):
+            # Same rule as the single lookup: the year only counts when it looks real.
+            params = []
+            for idx, (title, year) in chunk:
+                params.extend((idx, normalize_title(title), year if year and year > 1900 else None))
+
+            values = ", ".join(["(?, ?, ?)"] * len(chunk))
+            query = f"""
+                WITH wanted(idx, title, year) AS (VALUES {values})
+                SELECT wanted.idx AS _wanted_idx, movies.*
+                FROM wanted
+                JOIN movies
+                  ON movies.norm_title = wanted.title
+                 AND (wanted.year IS NULL
+                      OR movies.year BETWEEN wanted.year - {YEAR_TOLERANCE} AND wanted.year + {YEAR_TOLERANCE})
+                ORDER BY wanted.idx,
+                         COALESCE(ABS(movies.year - wanted.year), 0),
+                         CASE WHEN wanted.year IS NULL THEN 0 ELSE movies.year END,
+                         movies.rowid
+            """
+            for row in cursor.execute(query, params):
+                row = dict(row)
+                idx = row.pop("_wanted_idx")
+                if results[idx] is None:
+                    results[idx] = row
+
+        return results
+
+    except Exception as e:
+        err_msg = f"❌ DB BATCH ERROR: {str(e)}"
+        print(err_msg)
+        logger.error(err_msg)
+        return results
+
+def get_simple_metadata_batch(titles: List[str]) -> dict:
+    """
+    Set-based version of get_simple_metadata.
+    Returns {lowercased title: {title, year, poster_url}} for every title found.
+    """
+    found = {}
+    wanted = list(dict.fromkeys(t.strip() for t in titles if t and t.strip()))
+    if not wanted:
+        return found
+
+    if CATALOG.is_loaded:
+        for title, meta in CATALOG.find_simple_many(wanted).items():
+            found.setdefault(title.lower(), meta)
+        return found
+
+    try:
+        ensure_schema()
+        cursor = get_db_connection().cursor()
+
+        for chunk in _chunked(wanted):
+            values = ", ".join(["(?, ?)"] * len(chunk))
+            params = [p for title in chunk for p in (title, normalize_title(title))]
+            query = f"""
+                WITH wanted(title, norm_title) AS (VALUES {values})
+                SELECT wanted.title AS _wanted_title, movies.title, movies.year, movies.poster_url
+                FROM wanted
+                JOIN movies ON movies.norm_title = wanted.norm_title
+                ORDER BY movies.rowid
+            """
+            for row in cursor.execute(query, params):
+                row = dict(row)
+                key = row.pop("_wanted_title").lower()
+                found.setdefault(key, row)
+
+        return found
+    except Exception:
+        return found
@@ -1,13 +1,19 @@
 import os
 import json
 import time
-import sqlite3
-import requests
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import ollama
 import logging
 import pandas as pd
 from tqdm import tqdm  # This tracks the process
+import sqlite3
+from db import get_pool, close_pools, migrate_schema, normalize_title, BatchWriter
+from tmdb_client import TMDBClient
+from work_queue import WorkQueue, PENDING, GENERATED, DONE, DEAD
 
 load_dotenv()
 
@@ -18,6 +24,19 @@ DELAY_BETWEEN_CALLS = 0.35  # seconds
 MAX_SIMILAR_FILMS = 5
 DB_PATH = "enriched_movies.db"
 
+# Pipeline: TMDB fetchers -> bounded queue -> Ollama workers -> bounded queue -> one writer
+TMDB_WORKERS = int(os.getenv("ENRICH_TMDB_WORKERS", "4"))
+TMDB_RATE_PER_SECOND = float(os.getenv("ENRICH_TMDB_RATE", str(1 / DELAY_BETWEEN_CALLS)))
+OLLAMA_WORKERS = int(os.getenv("ENRICH_OLLAMA_WORKERS", "2"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("ENRICH_QUEUE_SIZE", "16"))
+# Films per Ollama request (1 = one prompt per film). Failed batches are split down.
+OLLAMA_BATCH_SIZE = int(os.getenv("ENRICH_OLLAMA_BATCH_SIZE", "1"))
+BATCH_FILL_TIMEOUT = 0.5  # seconds a worker waits to fill a batch before sending it short
+# Retries due within this many seconds are waited for; later ones are left for the next run
+PIPELINE_MAX_RETRY_WAIT = float(os.getenv("ENRICH_MAX_RETRY_WAIT", "120"))
+# No job finishing for this long means a stage is wedged: stop and let the next run resume
+PIPELINE_STALL_SECONDS = float(os.getenv("ENRICH_STALL_SECONDS", "900"))
+
 # --- LOGGING SETUP ---
 logging.basicConfig(
     level=logging.INFO,
@@ -27,12 +46,13 @@ logging.basicConfig(
 logger = logging.getLogger("EnrichmentEngine")
 
 # --- SETUP SQLITE DB ---
-conn = sqlite3.connect(DB_PATH)
+conn = get_pool(DB_PATH, read_only=False).connection()
 cursor = conn.cursor()
 cursor.execute("""
 CREATE TABLE IF NOT EXISTS movies (
     tmdb_id INTEGER PRIMARY KEY,
     title TEXT,
+    norm_title TEXT,
     year INTEGER,
     overview TEXT,
     runtime INTEGER,
@@ -59,25 +79,42 @@ CREATE TABLE IF NOT EXISTS movies (
 )
 """)
 conn.commit()
+migrate_schema(DB_PATH)  # (norm_title, year) index + backfill for older files
+
+def get_db():
+    # Each thread (e.g. the pipeline writer) uses its own pooled connection.
+    return get_pool(DB_PATH, read_only=False).connection()
+
+# Rows are buffered and committed in batches (every N rows / T seconds), not one fsync per film
+WRITER = BatchWriter(DB_PATH)
+
+# Durable job table: what is left to do, attempts and backoff, dead letters (enrich_jobs_dead_letter)
+JOBS = WorkQueue(DB_PATH, table="enrich_jobs")
+
+MOVIE_UPSERT_SQL = """
+INSERT OR REPLACE INTO movies (
+    tmdb_id,title,norm_title,year,overview,runtime,director,cast,original_language,poster_url,trailer_url,
+    certification,streaming_info,primary_aesthetic,fit_quote,social_friction,focus_load,tone_label,
+    emotional_aftertaste,perfect_occasion,similar_films,vibe_signature_label,vibe_signature_val,
+    palette_name,palette_colors
+) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
 
 # --- TMDB HELPERS (OPTIMIZED) ---
+# Shared client: keep-alive pool, on-disk response cache, rate limit on real requests only
+TMDB = TMDBClient(TMDB_API_KEY, rate=TMDB_RATE_PER_SECOND, pool_size=TMDB_WORKERS)
+
 def fetch_tmdb_details(tmdb_id):
-    base_url = "https://api.themoviedb.org/3"
-    
-    params = {
-        "api_key": TMDB_API_KEY,
-        "language": "en-US",
-        "append_to_response": "credits,release_dates,watch/providers,similar,videos"
-    }
-    
     try:
-        response = requests.get(f"{base_url}/movie/{tmdb_id}", params=params)
+        response = TMDB.movie(tmdb_id, append_to_response="credits,release_dates,watch/providers,similar,videos")
         
-        if response.status_code != 200:
-            logger.warning(f"Skipping ID {tmdb_id}: TMDB returned {response.status_code}")
-            return {}
+        if not response.ok:
+            logger.warning(f"Skipping ID {tmdb_id}: TMDB returned {response.status} ({response.source})")
+            # 404 will never succeed; 429/5xx (and offline misses) are worth a retry
+            return {"tmdb_id": tmdb_id, "error": f"TMDB returned {response.status}",
+                    "permanent": response.status == 404}
             
-        data = response.json()
+        data = response.data
         
         director = "Unknown"
         cast = []
@@ -114,8 +151,6 @@ def fetch_tmdb_details(tmdb_id):
                     trailer_url = f"https://www.youtube.com/watch?v={vid['key']}"
                     break
 
-        time.sleep(DELAY_BETWEEN_CALLS) 
-
         return {
             "tmdb_id": tmdb_id,
             "title": data.get("title"),
@@ -133,7 +168,7 @@ def fetch_tmdb_details(tmdb_id):
         }
     except Exception as e:
         logger.error(f"Error fetching ID {tmdb_id}: {e}")
-        return {}
+        return {"tmdb_id": tmdb_id, "error": f"TMDB fetch: {e}"}
 
 # --- AI ENRICHMENT ---
 def _get_prompt(movie):
@@ -179,8 +214,99 @@ def generate_via_ollama(movie):
         logger.error(f"⚠️ Ollama fail: {e}")
         return None
 
+# --- BATCHED AI ENRICHMENT ---
+def _get_batch_prompt(movies):
+    """Same instructions as _get_prompt, paid once for the whole batch."""
+    films_text = ""
+    for n, movie in enumerate(movies, 1):
+        films_text += (
+            f"<FILM_{n}>\n"
+            f"TMDB_ID: {movie['tmdb_id']}\n"
+            f"TITLE: {movie['title']} ({movie.get('year', '')})\n"
+            f"SYNOPSIS: {movie['overview']}\n"
+            f"</FILM_{n}>\n\n"
+        )
+    return f"""
+### SYSTEM ROLE: CULTURAL CURATOR
+Analyze each film below independently.
+
+{films_text}
+### TASK: Generate strict JSON metadata for EVERY film.
+1. AESTHETIC LABEL (Max 2 words)
+2. THE FIT (Max 15 words)
+3. SOCIAL FRICTION
+4. FOCUS LOAD
+5. TONE
+6. EMOTIONAL AFTERTASTE
+7. PERFECT OCCASION
+8. SIMILAR FILMS (max 5)
+9. VIBE SIGNATURE COLORS (top 3 hex)
+### OUTPUT JSON (one key per TMDB_ID, exactly {len(movies)} keys):
+{{
+    "films": {{
+        "<TMDB_ID>": {{
+            "primary_aesthetic": "string",
+            "fit_quote": "string",
+            "social_friction": "string",
+            "focus_load": "string",
+            "tone_label": "string",
+            "emotional_aftertaste": "string",
+            "perfect_occasion": "string",
+            "similar_films": ["A","B","C","D","E"],
+            "vibe_signature": {{"label":"string","val_percent":0}},
+            "palette": {{"name":"string","colors":["#000000","#FFFFFF","#123456"]}}
+        }}
+    }}
+}}
+"""
+
+def _valid_metadata(metadata):
+    return isinstance(metadata, dict) and bool(metadata.get("primary_aesthetic"))
+
+def generate_batch_via_ollama(movies):
+    """One Ollama call for several films. Returns {tmdb_id: metadata} for the films it got right."""
+    try:
+        response = ollama.chat(
+            model="llama3.1",
+            messages=[{"role": "user", "content": _get_batch_prompt(movies)}],
+            format="json"
+        )
+        films = json.loads(response['message']['content']).get("films", {})
+    except Exception as e:
+        logger.error(f"⚠️ Ollama batch fail ({len(movies)} films): {e}")
+        return {}
+
+    results = {}
+    if isinstance(films, dict):
+        for movie in movies:
+            metadata = films.get(str(movie["tmdb_id"]))
+            if _valid_metadata(metadata):
+                results[movie["tmdb_id"]] = metadata
+    return results
+
+def generate_with_split(movies):
+    """
+    Batched generation that degrades gracefully: films missing from a
+    batch answer are retried in two halves, down to the single-film prompt.
+    Returns {tmdb_id: metadata}; films that fail even alone are absent.
+    """
+    if len(movies) == 1:
+        metadata = generate_via_ollama(movies[0])
+        return {movies[0]["tmdb_id"]: metadata} if _valid_metadata(metadata) else {}
+
+    results = generate_batch_via_ollama(movies)
+    missing = [m for m in movies if m["tmdb_id"] not in results]
+    if missing:
+        if len(missing) < len(movies):
+            logger.warning(f"Batch of {len(movies)} returned {len(results)}; retrying {len(missing)} in halves")
+        half = (len(missing) + 1) // 2
+        results.update(generate_with_split(missing[:half]))
+        if missing[half:]:
+            results.update(generate_with_split(missing[half:]))
+    return results
+
 # --- SAVE TO SQLITE ---
-def save_to_db(movie):
+def save_to_db(movie, jobs=None):
     # Safety checks for joining lists to prevent "can only join an iterable" errors
     cast_data = movie.get("cast", [])
     cast_str = ", ".join(cast_data) if isinstance(cast_data, list) else str(cast_data)
@@ -191,16 +317,10 @@ def save_to_db(movie):
     palette_colors_data = movie.get("palette_colors", [])
     palette_colors_str = ", ".join(palette_colors_data) if isinstance(palette_colors_data, list) else ""
 
-    cursor.execute("""
-    INSERT OR REPLACE INTO movies (
-        tmdb_id,title,year,overview,runtime,director,cast,original_language,poster_url,trailer_url,
-        certification,streaming_info,primary_aesthetic,fit_quote,social_friction,focus_load,tone_label,
-        emotional_aftertaste,perfect_occasion,similar_films,vibe_signature_label,vibe_signature_val,
-        palette_name,palette_colors
-    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-    """, (
+    row = (
         movie["tmdb_id"],
         movie["title"],
+        normalize_title(movie["title"]),
         movie["year"],
         movie["overview"],
         movie["runtime"],
@@ -223,52 +343,349 @@ def save_to_db(movie):
         movie.get("vibe_signature", {}).get("val_percent"),
         movie.get("palette_name"),
         palette_colors_str
-    ))
-    conn.commit()
+    )
+    # One group, so the row and the job's "done" mark always land in the same transaction
+    WRITER.add_group([
+        (MOVIE_UPSERT_SQL, row),
+        ((jobs or JOBS).done_sql(), (time.time(), movie["tmdb_id"])),
+    ])
 
 # --- ENRICH AND SAVE ---
+def _to_percent(value):
+    """Ollama writes 75, 75.0, "75" or "75%"; anything unparseable becomes 0. Clamped to 0-100."""
+    if isinstance(value, str):
+        value = value.strip().rstrip("%").strip()
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0
+    if number != number:  # NaN
+        return 0
+    return int(min(max(number, 0), 100))
+
+def build_enriched(movie_data, metadata):
+    """Merges TMDB details with the Ollama metadata into one row for save_to_db."""
+    vibe = metadata.get("vibe_signature")
+    if isinstance(vibe, dict) and vibe:
+        vibe["val_percent"] = _to_percent(vibe.get("val_percent", 0))
+    else:
+        metadata["vibe_signature"] = {"label": "Unknown", "val_percent": 0}
+    if not isinstance(metadata.get("palette"), dict):
+        metadata["palette"] = {}
+
+    enriched_movie = {
+        **movie_data,
+        "primary_aesthetic": metadata.get("primary_aesthetic"),
+        "fit_quote": metadata.get("fit_quote"),
+        "social_friction": metadata.get("social_friction"),
+        "focus_load": metadata.get("focus_load"),
+        "tone_label": metadata.get("tone_label"),
+        "emotional_aftertaste": metadata.get("emotional_aftertaste"),
+        "perfect_occasion": metadata.get("perfect_occasion"),
+        "similar_films": metadata.get("similar_films", movie_data.get("similar_films", [])),
+        "vibe_signature": metadata.get("vibe_signature"),
+        "palette": metadata.get("palette", {}),
+        "palette_name": metadata.get("palette", {}).get("name"),
+        "palette_colors": metadata.get("palette", {}).get("colors")
+    }
+    return enriched_movie
+
 def enrich_and_save(tmdb_id):
+    # Failures are recorded on the job (retry with backoff, or dead letter) instead of just logged
     try:
         movie_data = fetch_tmdb_details(tmdb_id)
         if not movie_data.get("title"):
+            JOBS.fail(tmdb_id, movie_data.get("error", "TMDB returned no title"), movie_data.get("permanent", False))
             return None
 
         metadata = generate_via_ollama(movie_data)
         
         if not metadata:
             logger.error(f"ID {tmdb_id}: AI generation failed.")
+            JOBS.fail(tmdb_id, "Ollama returned no valid metadata")
             return None
 
-        vibe_val = metadata.get("vibe_signature", {}).get("val_percent", 0)
-        if metadata.get("vibe_signature"):
-            metadata["vibe_signature"]["val_percent"] = min(max(vibe_val, 0), 100)
-        else:
-            metadata["vibe_signature"] = {"label": "Unknown", "val_percent": 0}
-
-        enriched_movie = {
-            **movie_data,
-            "primary_aesthetic": metadata.get("primary_aesthetic"),
-            "fit_quote": metadata.get("fit_quote"),
-            "social_friction": metadata.get("social_friction"),
-            "focus_load": metadata.get("focus_load"),
-            "tone_label": metadata.get("tone_label"),
-            "emotional_aftertaste": metadata.get("emotional_aftertaste"),
-            "perfect_occasion": metadata.get("perfect_occasion"),
-            "similar_films": metadata.get("similar_films", movie_data.get("similar_films", [])),
-            "vibe_signature": metadata.get("vibe_signature"),
-            "palette": metadata.get("palette", {}),
-            "palette_name": metadata.get("palette", {}).get("name"),
-            "palette_colors": metadata.get("palette", {}).get("colors")
-        }
-
+        enriched_movie = build_enriched(movie_data, metadata)
         save_to_db(enriched_movie)
         return enriched_movie
     except Exception as e:
         logger.error(f"Critical error on ID {tmdb_id}: {e}")
+        JOBS.fail(tmdb_id, str(e))
         return None
 
+# --- PIPELINE ---
+_DONE = object()  # end-of-stream marker between stages
+
+def run_pipeline(jobs=None, tmdb_workers=TMDB_WORKERS, ollama_workers=OLLAMA_WORKERS,
+                 queue_size=PIPELINE_QUEUE_SIZE, batch_size=OLLAMA_BATCH_SIZE,
+                 max_retry_wait=PIPELINE_MAX_RETRY_WAIT):
+    """
+    Works through the job table with every stage running concurrently:
+    rate-limited TMDB fetchers -> bounded queue -> N Ollama workers ->
+    bounded queue -> a single SQLite writer. Bounded queues give
+    backpressure, so throughput is set by the slowest stage rather than
+    the sum of all of them.
+    Jobs are claimed from `jobs` (default JOBS) a few at a time; failures
+    go back with backoff and retries due within max_retry_wait seconds are
+    picked up in this run. Ollama output is stored on the job before the
+    write, so results generated by an interrupted run are only written.
+    Returns outcome counts.
+    """
+    jobs = jobs or JOBS
+    recovered = jobs.recover()
+    if recovered:
+        logger.info(f"Recovered {recovered} jobs left running by an earlier run")
+    counts = jobs.counts()
+
+    fetched = queue.Queue(maxsize=queue_size)
+    enriched = queue.Queue(maxsize=queue_size)
+    stats = Counter()
+    lock = threading.Lock()
+    inflight = [0]
+    finished = [0]
+    stop = threading.Event()  # set when a stage died or nothing finished for PIPELINE_STALL_SECONDS
+    max_inflight = queue_size * 2 + tmdb_workers  # claimed but not finished
+    pbar = tqdm(total=counts[PENDING] + counts[GENERATED], desc="Enriching Movies", unit="film")
+
+    def finish(tmdb_id, outcome, error=None, permanent=False):
+        # Every claimed job passes through here exactly once; inflight must drop even if recording fails
+        status = None
+        try:
+            if error is not None:
+                status = jobs.fail(tmdb_id, error, permanent)
+        except Exception as e:
+            logger.error(f"Could not record failure for ID {tmdb_id}: {e}")
+        finally:
+            with lock:
+                stats[outcome] += 1
+                inflight[0] -= 1
+                finished[0] += 1
+                if status == PENDING:
+                    stats["retried"] += 1
+                else:
+                    pbar.update(1)
+
+    def put(q, item):
+        """Blocking put that gives up once the pipeline is stopping."""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q):
+        """Blocking get that reads as end-of-stream once the pipeline is stopping."""
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def fetch_one(tmdb_id):
+        try:
+            movie = fetch_tmdb_details(tmdb_id)
+        except Exception as e:
+            movie = {"tmdb_id": tmdb_id, "error": f"TMDB fetch: {e}"}
+        if not movie.get("title"):
+            finish(tmdb_id, "tmdb_failed", movie.get("error", "TMDB returned no title"), movie.get("permanent", False))
+        elif not put(fetched, movie):  # blocks while the Ollama stage is behind
+            pass  # stopping: the job stays 'running' and recover() requeues it next run
+
+    last_progress = [0, time.monotonic()]  # (finished count, when it last moved)
+
+    def stalled():
+        if not writer.is_alive() or not any(thread.is_alive() for thread in generators):
+            logger.error("❌ A pipeline stage died; stopping. Unfinished jobs resume on the next run.")
+            return True
+        if time.monotonic() - last_progress[1] > PIPELINE_STALL_SECONDS:
+            logger.error(f"❌ No job finished for {PIPELINE_STALL_SECONDS:.0f}s; stopping. Unfinished jobs resume on the next run.")
+            return True
+        return False
+
+    def produce():
+        try:
+            # Generated by an earlier run but never written: straight to the writer
+            for movie in jobs.generated():
+                with lock:
+                    inflight[0] += 1
+                if not put(enriched, movie):
+                    return
+
+            with ThreadPoolExecutor(max_workers=tmdb_workers, thread_name_prefix="tmdb") as pool:
+                while True:
+                    if finished[0] != last_progress[0]:
+                        last_progress[:] = [finished[0], time.monotonic()]
+                    if stalled():
+                        stop.set()
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        return
+                    room = max_inflight - inflight[0]
+                    claimed = jobs.claim(room) if room > 0 else []
+                    if claimed:
+                        with lock:
+                            inflight[0] += len(claimed)
+                        for tmdb_id in claimed:
+                            pool.submit(fetch_one, tmdb_id)
+                        continue
+                    if inflight[0] > 0:
+                        time.sleep(0.2)  # failures still in flight may come back as retries
+                        continue
+                    wait = jobs.next_due_in()
+                    if wait is None or wait > max_retry_wait:
+                        break
+                    last_progress[1] = time.monotonic() + wait  # waiting on backoff is not a stall
+                    time.sleep(max(wait, 0.05))
+        except Exception as e:
+            logger.error(f"❌ Producer failed: {e}")
+            stop.set()
+        finally:
+            for _ in range(ollama_workers):
+                put(fetched, _DONE)
+
+    def hand_off(movie, metadata):
+        # One malformed answer must not take the worker (and every job behind it) down
+        try:
+            enriched_movie = build_enriched(movie, metadata)
+        except Exception as e:
+            logger.error(f"ID {movie['tmdb_id']}: unusable Ollama metadata: {e}")
+            finish(movie["tmdb_id"], "ollama_failed", f"build: {e}")
+            return
+        try:
+            jobs.store_result(movie["tmdb_id"], enriched_movie)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store result for ID {movie['tmdb_id']}: {e}")
+        put(enriched, enriched_movie)
+
+    def generate():
+        done = False
+        while not done:
+            movie = get(fetched)
+            if movie is _DONE:
+                return
+            batch = [movie]
+            # Fill the batch with whatever arrives shortly; don't stall on a slow TMDB stage
+            while len(batch) < batch_size:
+                try:
+                    movie = fetched.get(timeout=BATCH_FILL_TIMEOUT)
+                except queue.Empty:
+                    break
+                if movie is _DONE:
+                    done = True
+                    break
+                batch.append(movie)
+
+            try:
+                results = generate_with_split(batch)
+            except Exception as e:
+                logger.error(f"Critical error on batch {[m.get('tmdb_id') for m in batch]}: {e}")
+                results = {}
+            for movie in batch:
+                metadata = results.get(movie["tmdb_id"])
+                if not metadata:
+                    logger.error(f"ID {movie['tmdb_id']}: AI generation failed.")
+                    finish(movie["tmdb_id"], "ollama_failed", "Ollama returned no valid metadata")
+                    continue
+                try:
+                    hand_off(movie, metadata)
+                except Exception as e:
+                    logger.error(f"ID {movie['tmdb_id']}: hand-off failed: {e}")
+                    finish(movie["tmdb_id"], "ollama_failed", f"hand-off: {e}")
+
+    def write():
+        while True:
+            movie = get(enriched)
+            if movie is _DONE:
+                return
+            try:
+                save_to_db(movie, jobs)
+            except sqlite3.Error:
+                pass  # a failed flush is counted by WRITER (this row included), reconciled below
+            except Exception as e:
+                logger.error(f"DB write failed for ID {movie.get('tmdb_id')}: {e}")
+                finish(movie["tmdb_id"], "write_failed", f"write: {e}")
+                continue
+            finish(movie["tmdb_id"], "saved")
+
+    failed_before = WRITER.rows_failed
+    producer = threading.Thread(target=produce, name="tmdb-producer")
+    generators = [threading.Thread(target=generate, name=f"ollama-{i}") for i in range(ollama_workers)]
+    writer = threading.Thread(target=write, name="db-writer")
+    for thread in (writer, *generators, producer):
+        thread.start()
+
+    producer.join()
+    for thread in generators:
+        thread.join()
+    put(enriched, _DONE)
+    writer.join()
+    if stop.is_set():
+        stats["stopped_early"] = 1
+    try:
+        WRITER.flush()
+    except sqlite3.Error:
+        pass
+    pbar.close()
+
+    # Each saved film is two buffered rows (movie + job done); their jobs stay 'generated' for the next run
+    failed = (WRITER.rows_failed - failed_before) // 2
+    if failed:
+        stats["saved"] -= failed
+        stats["write_failed"] += failed
+    return dict(stats)
+
+# --- BENCHMARK ---
+def benchmark_batch_sizes(ids, batch_sizes=(1, 2, 4, 8)):
+    """
+    Films/minute of the Ollama stage alone for each batch size, on the same
+    TMDB sample (fetched once, nothing written). Prints a table and returns
+    {batch_size: (films_per_minute, success_rate)}.
+    """
+    movies = [m for m in (fetch_tmdb_details(tid) for tid in tqdm(ids, desc="Fetching sample", unit="film"))
+              if m.get("title")]
+    if not movies:
+        logger.error("Benchmark sample is empty (TMDB fetch failed).")
+        return {}
+
+    report = {}
+    for size in batch_sizes:
+        start = time.time()
+        succeeded = 0
+        for i in tqdm(range(0, len(movies), size), desc=f"Batch size {size}", unit="batch"):
+            succeeded += len(generate_with_split(movies[i:i + size]))
+        elapsed = time.time() - start
+        report[size] = (len(movies) / elapsed * 60, succeeded / len(movies))
+
+    print(f"\n📊 Ollama throughput on {len(movies)} films")
+    print(f"{'batch':>6} | {'films/min':>9} | {'ok':>5}")
+    for size, (per_minute, ok) in report.items():
+        print(f"{size:>6} | {per_minute:>9.1f} | {ok:>5.0%}")
+    return report
+
 # --- MAIN EXECUTION BLOCK ---
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Enrich the top films with TMDB details and Ollama metadata.")
+    parser.add_argument("--batch-size", type=int, default=OLLAMA_BATCH_SIZE, help="Films per Ollama request")
+    parser.add_argument("--benchmark", help="Comma-separated batch sizes to benchmark instead of enriching (e.g. 1,2,4,8)")
+    parser.add_argument("--sample", type=int, default=24, help="Films used by --benchmark")
+    parser.add_argument("--dead-letters", action="store_true", help="List permanently failed films and exit")
+    parser.add_argument("--requeue-dead", action="store_true", help="Give dead films a fresh set of attempts")
+    parser.add_argument("--offline", action="store_true", help="Replay TMDB responses from the cache only (same as TMDB_OFFLINE=1)")
+    args = parser.parse_args()
+    if args.offline:
+        TMDB.offline = True
+
+    if args.dead_letters:
+        for job in JOBS.dead_letters(limit=1000):
+            print(f"{job['job_id']:>8} | {job['attempts']} attempts | {job['failed_at']} | {job['last_error']}")
+        print(f"💀 {JOBS.counts()[DEAD]} dead jobs")
+        exit()
+    if args.requeue_dead:
+        logger.info(f"Requeued {JOBS.requeue_dead()} dead jobs")
+
     input_file = "backend/data/cleaned_movies.csv"
     
     if not os.path.exists(input_file):
@@ -280,17 +697,26 @@ if __name__ == "__main__":
     
     df = df.sort_values(by='popularity', ascending=False).head(5000).copy()
     
-    existing_ids_query = cursor.execute("SELECT tmdb_id FROM movies").fetchall()
-    existing_ids = set(row[0] for row in existing_ids_query)
-    
+    # Films enriched before the job table existed count as done; new CSV ids join as pending
+    JOBS.enqueue_from("SELECT tmdb_id FROM movies", status=DONE)
     id_col = 'id' if 'id' in df.columns else 'tmdb_id'
     all_ids = df[id_col].tolist()
-    ids_to_process = [tid for tid in all_ids if tid not in existing_ids]
+    added = JOBS.enqueue(all_ids)
+
+    if args.benchmark:
+        benchmark_batch_sizes(all_ids[:args.sample], [int(n) for n in args.benchmark.split(",")])
+        close_pools()
+        exit()
 
-    logger.info(f"Total: {len(all_ids)} | Done: {len(existing_ids)} | Queue: {len(ids_to_process)}")
+    counts = JOBS.counts()
+    logger.info(f"Total: {len(all_ids)} (+{added} new) | Done: {counts[DONE]} | Queue: {counts[PENDING]} "
+                f"| To write: {counts[GENERATED]} | Dead: {counts[DEAD]}")
+    logger.info(f"Pipeline: {TMDB_WORKERS} TMDB fetchers @ {TMDB_RATE_PER_SECOND:.1f}/s, "
+                f"{OLLAMA_WORKERS} Ollama workers x {args.batch_size} films/request")
 
-    for tid in tqdm(ids_to_process, desc="Enriching Movies", unit="film"):
-        enrich_and_save(tid)
+    outcome = run_pipeline(JOBS, batch_size=args.batch_size)
             
-    logger.info("Batch processing complete.")
-    conn.close()
\ No newline at end of file
+    WRITER.close()
+    logger.info(f"Batch processing complete. {outcome} | jobs: {JOBS.counts()} | writer: {WRITER.stats()}")
+    logger.info(f"TMDB: {TMDB.stats()}")
+    close_pools()
\ No newline at end of file
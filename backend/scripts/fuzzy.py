@@ -0,0 +1,76 @@
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+from thefuzz import fuzz
+
+# --- CONFIG ---
+FUZZY_MIN_SCORE = 90        # same bar the old thefuzz fallback used
+FUZZY_MAX_CANDIDATES = 24   # titles that get a real score
+# WRatio scales partial matches by 0.6 past this length ratio, so they can never reach 90
+WRATIO_MAX_LEN_RATIO = 8
+
+def _trigrams(text: str) -> set:
+    # Padding lets short titles and word starts produce trigrams too.
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """
+    Persistent fuzzy index over normalized titles.
+    A trigram inverted index narrows the catalog to a handful of
+    candidates; only those are scored, with the same scorer
+    (thefuzz WRatio) the old full-table process.extractOne used, so
+    "godfather" still finds "the godfather".
+    """
+    def __init__(self, min_score: int = FUZZY_MIN_SCORE, max_candidates: int = FUZZY_MAX_CANDIDATES):
+        self.min_score = min_score
+        self.max_candidates = max_candidates
+        self.titles: List[str] = []
+        self.postings: dict = {}    # trigram -> list of title ids
+        self.lookups = 0
+        self.hits = 0
+
+    def build(self, titles: Iterable[str]) -> "TrigramIndex":
+        """Indexes already-normalized titles. Title ids are their positions in `titles`."""
+        self.titles = list(titles)
+        postings = {}
+        for title_id, title in enumerate(self.titles):
+            for gram in _trigrams(title):
+                postings.setdefault(gram, []).append(title_id)
+        self.postings = postings
+        return self
+
+    def search(self, norm_query: str) -> List[Tuple[int, float]]:
+        """Returns (title_id, score) pairs at or above min_score, best first."""
+        self.lookups += 1
+        if not norm_query or not self.titles:
+            return []
+
+        overlap = Counter()
+        for gram in _trigrams(norm_query):
+            overlap.update(self.postings.get(gram, ()))
+
+        q_len = len(norm_query)
+
+        scored = []
+        for title_id, _ in overlap.most_common(self.max_candidates):
+            title = self.titles[title_id]
+            shorter, longer = sorted((q_len, len(title)))
+            if longer > shorter * WRATIO_MAX_LEN_RATIO:
+                continue
+            score = fuzz.WRatio(norm_query, title)
+            if score >= self.min_score:
+                scored.append((title_id, score))
+
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        if scored:
+            self.hits += 1
+        return scored
+
+    def stats(self) -> dict:
+        return {
+            "titles": len(self.titles),
+            "trigrams": len(self.postings),
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
@@ -1,17 +1,172 @@
 import os
 import re
 import hashlib
-import sqlite3
 import time
+import asyncio
+import threading
+from collections import deque
 from enum import Enum, auto
 from dataclasses import dataclass
-from openai import OpenAI
-from thefuzz import process 
+from typing import Iterable, List, Tuple
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+from scripts.db import CATALOG, load_catalog, find_movie_metadata, find_movie_fuzzy
 
 load_dotenv()
-DB_NAME = "motif_core.db"
 MOD_CLIENT = OpenAI(api_key=os.getenv("OPENAI_API_KEY")) 
+ASYNC_MOD_CLIENT = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Hard deadline for the remote moderation call; past it we fail open.
+MODERATION_TIMEOUT_SECONDS = float(os.getenv("MODERATION_TIMEOUT_SECONDS", "0.5"))
+MODERATION_VERDICT_TTL_SECONDS = int(os.getenv("MODERATION_VERDICT_TTL_SECONDS", str(24 * 3600)))
+MODERATION_VERDICT_MAX_ENTRIES = 50000
+
+# --- LOCAL PRE-FILTER ---
+# Queries are matched on normalized text (lowercase, alphanumerics, single spaces).
+# "block" terms are decided locally as flagged, "review" terms are ambiguous and
+# go to the remote API; anything else that passes the heuristics is safe locally.
+SAFETY_PREFILTER_ENABLED = os.getenv("SAFETY_PREFILTER_ENABLED", "1") == "1"
+SAFETY_BLOCKLIST_PATH = os.getenv(
+    "SAFETY_BLOCKLIST_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "safety_blocklist.txt")
+)
+DEFAULT_BLOCK_TERMS = [
+    "ignore previous instructions", "ignore all instructions", "ignore your instructions",
+    "disregard previous instructions", "reveal your system prompt", "print your system prompt",
+    "child porn", "child sexual", "cp links",
+    "how to make a bomb", "how to build a bomb", "make meth", "cook meth",
+    "kill myself", "how to kill someone",
+]
+DEFAULT_REVIEW_TERMS = [
+    "porn", "nude", "naked", "sex", "nsfw", "hentai", "rape", "incest", "underage", "minor",
+    "suicide", "self harm", "selfharm", "cutting myself",
+    "bomb", "explosive", "weapon", "shoot up", "terroris", "massacre", "nazi", "genocide",
+    "drug", "cocaine", "heroin", "fentanyl",
+    "system prompt", "jailbreak", "instructions",
+]
+# Film-vibe queries are short phrases; essays, number soup or keyboard mash
+# are unusual enough to get a second opinion.
+PREFILTER_MAX_WORDS = 20
+PREFILTER_MAX_TOKEN_LENGTH = 25
+PREFILTER_MAX_DIGIT_RATIO = 0.3
+
+def normalize_text(text: str) -> str:
+    if not text: return ""
+    text = re.sub(r'[^a-z0-9\s]', '', text.lower()) 
+    return re.sub(r'\s+', ' ', text).strip()
+
+def load_blocklist(path: str = SAFETY_BLOCKLIST_PATH) -> Tuple[List[str], List[str]]:
+    """
+    Default terms plus an optional blocklist file with one `block: term` or
+    `review: term` per line (`#` comments allowed).
+    """
+    block, review = list(DEFAULT_BLOCK_TERMS), list(DEFAULT_REVIEW_TERMS)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                kind, _, term = line.partition(":")
+                target = block if kind.strip().lower() == "block" else review if kind.strip().lower() == "review" else None
+                if target is None or not term.strip():
+                    print(f"⚠️ Ignoring blocklist line: '{line}'")
+                    continue
+                target.append(term.strip())
+    return block, review
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: one pass over the text finds every blocklist term,
+    however many terms there are. Patterns only match at the start of a word,
+    so "bomb" hits "bombs" and "bombshell" but not "abomb".
+    """
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        # patterns: (term, label); terms are expected already normalized
+        self.goto: List[dict] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[list] = [[]]
+        self.size = 0
+        for term, label in patterns:
+            self._add(" " + term, label)
+        self._build()
+
+    def _add(self, term: str, label: str):
+        state = 0
+        for ch in term:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append((term[1:], label))
+        self.size += 1
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[str, str]]:
+        """Returns (term, label) for every pattern occurring in the normalized text."""
+        matches = []
+        state = 0
+        for ch in " " + text:
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            if self.out[state]:
+                matches.extend(self.out[state])
+        return matches
+
+class SafetyPrefilter:
+    """
+    Local first pass in front of the moderation API.
+    screen() returns (decision, reason) with decision "safe", "block" or "escalate".
+    """
+    SAFE, BLOCK, ESCALATE = "safe", "block", "escalate"
+
+    def __init__(self, blocklist_path: str = SAFETY_BLOCKLIST_PATH):
+        block, review = load_blocklist(blocklist_path)
+        self.matcher = AhoCorasick(
+            [(normalize_text(t), "block") for t in block] + [(normalize_text(t), "review") for t in review]
+        )
+        self.counts = {self.SAFE: 0, self.BLOCK: 0, self.ESCALATE: 0}
+
+    def screen(self, normalized_text: str) -> Tuple[str, str]:
+        decision, reason = self._screen(normalized_text)
+        self.counts[decision] += 1
+        return decision, reason
+
+    def _screen(self, text: str) -> Tuple[str, str]:
+        matches = self.matcher.find(text)
+        blocked = [term for term, label in matches if label == "block"]
+        if blocked:
+            return self.BLOCK, f"Blocklist: {blocked[0]}"
+        if matches:
+            return self.ESCALATE, f"Review term: {matches[0][0]}"
+
+        words = text.split()
+        if len(words) > PREFILTER_MAX_WORDS:
+            return self.ESCALATE, "Long query"
+        if any(len(w) > PREFILTER_MAX_TOKEN_LENGTH for w in words):
+            return self.ESCALATE, "Unusual token"
+        letters = text.replace(" ", "")
+        if letters and sum(c.isdigit() for c in letters) / len(letters) > PREFILTER_MAX_DIGIT_RATIO:
+            return self.ESCALATE, "Mostly digits"
+        return self.SAFE, "Safe (Local)"
+
+    def stats(self) -> dict:
+        return {"patterns": self.matcher.size, **self.counts}
 
 class QueryIntent(Enum):
     VALID_INTENT = auto()
@@ -26,21 +181,30 @@ class ProcessedQuery:
     safety_reason: str = ""
 
 class InputIntelligence:
+    def __init__(self):
+        # normalized text -> (is_safe, reason, expires_at). Only real verdicts
+        # are stored, never "Check Failed" or timeouts.
+        self._verdicts: dict = {}
+        self._verdict_lock = threading.Lock()
+        self.moderation_calls = 0
+        self.verdict_hits = 0
+        self.moderation_timeouts = 0
+        self.prefilter = SafetyPrefilter() if SAFETY_PREFILTER_ENABLED else None
+
     def _normalize(self, text: str) -> str:
-        if not text: return ""
-        text = re.sub(r'[^a-z0-9\s]', '', text.lower()) 
-        return re.sub(r'\s+', ' ', text).strip()
+        return normalize_text(text)
 
     def _check_safety(self, text: str) -> tuple[bool, str]:
         """
         Safety check with a strict timeout. 
-        If OpenAI Mod API is slow (>0.5s), we fail open to keep the demo fast.
+        If OpenAI Mod API is slow (>MODERATION_TIMEOUT_SECONDS), we fail open to keep the demo fast.
         """
         start_time = time.time()
         try:
-            # Note: This is a synchronous call. In a real async prod app, use aiohttp.
-            # For this script, we rely on the API being generally fast.
-            response = MOD_CLIENT.moderations.create(input=text)
+            # Note: This is a synchronous call; the async API path uses _acheck_safety.
+            response = MOD_CLIENT.with_options(
+                timeout=MODERATION_TIMEOUT_SECONDS, max_retries=0
+            ).moderations.create(input=text)
             
             # Simple latency log
             if time.time() - start_time > 0.5:
@@ -52,34 +216,121 @@ class InputIntelligence:
         except:
             return True, "Check Failed (Skipped)"
 
+    async def _acheck_safety(self, text: str) -> tuple[bool, str]:
+        """Same check as _check_safety, without holding a thread while the API answers."""
+        start_time = time.time()
+        try:
+            # wait_for is the hard deadline; httpx timeouts are per phase, not total.
+            response = await asyncio.wait_for(
+                ASYNC_MOD_CLIENT.with_options(max_retries=0).moderations.create(input=text),
+                timeout=MODERATION_TIMEOUT_SECONDS,
+            )
+
+            if time.time() - start_time > 0.5:
+                print(f"⚠️ Safety Check was slow ({time.time() - start_time:.2f}s)")
+
+            if response.results[0].flagged:
+                return False, "Flagged Content"
+            return True, "Safe"
+        except asyncio.TimeoutError:
+            self.moderation_timeouts += 1
+            return True, "Check Timed Out (Skipped)"
+        except Exception:
+            return True, "Check Failed (Skipped)"
+
+    # --- VERDICT CACHE ---
+
+    def _cached_verdict(self, normalized_text: str):
+        item = self._verdicts.get(normalized_text)
+        if item and item[2] > time.time():
+            self.verdict_hits += 1
+            return item[0], item[1]
+        return None
+
+    def _remember_verdict(self, normalized_text: str, is_safe: bool, reason: str):
+        if reason not in ("Safe", "Flagged Content"):
+            return
+        with self._verdict_lock:
+            if len(self._verdicts) >= MODERATION_VERDICT_MAX_ENTRIES:
+                # Oldest insertion first (dicts keep insertion order)
+                self._verdicts.pop(next(iter(self._verdicts)))
+            self._verdicts[normalized_text] = (is_safe, reason, time.time() + MODERATION_VERDICT_TTL_SECONDS)
+
+    def _local_verdict(self, normalized_text: str):
+        """Pre-filter verdict, or None when the query has to go to the remote API."""
+        if self.prefilter is None:
+            return None
+        decision, reason = self.prefilter.screen(normalized_text)
+        if decision == SafetyPrefilter.SAFE:
+            return True, reason
+        if decision == SafetyPrefilter.BLOCK:
+            print(f"🛑 Blocked locally: {reason}")
+            return False, "Flagged Content (Local)"
+        return None
+
+    def moderate(self, normalized_text: str) -> tuple[bool, str]:
+        """Moderation verdict for a normalized query, cached per text."""
+        verdict = self._local_verdict(normalized_text) or self._cached_verdict(normalized_text)
+        if verdict:
+            return verdict
+        self.moderation_calls += 1
+        is_safe, reason = self._check_safety(normalized_text)
+        self._remember_verdict(normalized_text, is_safe, reason)
+        return is_safe, reason
+
+    async def amoderate(self, normalized_text: str) -> tuple[bool, str]:
+        """Async moderate(): local or cached verdict, else one deadline-bound remote call."""
+        verdict = self._local_verdict(normalized_text) or self._cached_verdict(normalized_text)
+        if verdict:
+            return verdict
+        self.moderation_calls += 1
+        is_safe, reason = await self._acheck_safety(normalized_text)
+        self._remember_verdict(normalized_text, is_safe, reason)
+        return is_safe, reason
+
+    def moderation_stats(self) -> dict:
+        return {
+            "remote_calls": self.moderation_calls,
+            "verdict_cache_hits": self.verdict_hits,
+            "verdict_cache_size": len(self._verdicts),
+            "timeouts": self.moderation_timeouts,
+            "timeout_seconds": MODERATION_TIMEOUT_SECONDS,
+            "prefilter": self.prefilter.stats() if self.prefilter else None,
+        }
+
     def fuzzy_db_check(self, movie_title: str) -> dict:
-        """Fast DB Lookup with Fuzzy Matching"""
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
+        """Fast DB Lookup with Fuzzy Matching (trigram index, no table scan)"""
+        if not CATALOG.is_loaded:
+            load_catalog()
+
         # 1. Exact Match
-        cursor.execute("SELECT * FROM movies WHERE lower(title) = ?", (movie_title.lower(),))
-        row = cursor.fetchone()
-        
+        row = find_movie_metadata(movie_title)
+
         # 2. Fuzzy Match (Fallback)
         if not row:
-            cursor.execute("SELECT title FROM movies")
-            all_titles = [r[0] for r in cursor.fetchall()]
-            match, score = process.extractOne(movie_title, all_titles) or (None, 0)
-            if score >= 90:
-                cursor.execute("SELECT * FROM movies WHERE title = ?", (match,))
-                row = cursor.fetchone()
+            row = find_movie_fuzzy(movie_title)
+
+        return row
 
-        conn.close()
-        return dict(row) if row else None
+    def preprocess(self, raw_input: str) -> ProcessedQuery:
+        """Local half of the gatekeeper: normalization and the low-signal check."""
+        norm = self._normalize(raw_input)
+        intent = QueryIntent.VALID_INTENT if len(norm) > 3 else QueryIntent.LOW_SIGNAL
+        
+        return ProcessedQuery(raw_input, norm, intent)
 
     def classify_intent(self, raw_input: str) -> ProcessedQuery:
-        is_safe, reason = self._check_safety(raw_input)
+        processed = self.preprocess(raw_input)
+        is_safe, reason = self.moderate(processed.normalized_text)
         if not is_safe:
             return ProcessedQuery(raw_input, raw_input, QueryIntent.MALICIOUS, reason)
 
-        norm = self._normalize(raw_input)
-        intent = QueryIntent.VALID_INTENT if len(norm) > 3 else QueryIntent.LOW_SIGNAL
-        
-        return ProcessedQuery(raw_input, norm, intent)
\ No newline at end of file
+        return processed
+
+    async def aclassify_intent(self, raw_input: str) -> ProcessedQuery:
+        processed = self.preprocess(raw_input)
+        is_safe, reason = await self.amoderate(processed.normalized_text)
+        if not is_safe:
+            return ProcessedQuery(raw_input, raw_input, QueryIntent.MALICIOUS, reason)
+
+        return processed
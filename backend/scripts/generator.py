@@ -1,19 +1,46 @@
 import os
-import json
 import hashlib
+import asyncio
+import time
 import logging  # <--- Added logging import
-from typing import Optional
-from openai import OpenAI
-from pydantic import BaseModel
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from openai import OpenAI, AsyncOpenAI
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import json_repair
 
 # Import our Layer 2 logic
 from scripts.gatekeeper import InputIntelligence, QueryIntent
+from scripts.query_cache import QueryCache, QUERY_CACHE_PATH, make_cache_key, legacy_cache_key
+from scripts.canonicalizer import QueryCanonicalizer
+from scripts.semantic_cache import SemanticIndex, SEMANTIC_CACHE_ENABLED, SEMANTIC_DEGRADED_THRESHOLD
+from scripts.singleflight import SingleFlight, AsyncSingleFlight
+from scripts.stream_parser import TitleStreamParser
+from scripts.negative_cache import NegativeCache
+from scripts.hedging import LatencyTracker, hedged
+from scripts.circuit_breaker import CircuitBreaker, CircuitOpenError, OPEN
+from scripts.db import run_db, find_movie_metadata
 # from gatekeeper import InputIntelligence, QueryIntent
 
 load_dotenv()
 
+# --- STALE-WHILE-REVALIDATE ---
+# Expired cache entries are served as-is while a background job regenerates them.
+SWR_MAX_CONCURRENT_REFRESHES = int(os.getenv("SWR_MAX_CONCURRENT_REFRESHES", "2"))
+SWR_MAX_PENDING_REFRESHES = int(os.getenv("SWR_MAX_PENDING_REFRESHES", "32"))
+
+# --- HEDGED REQUESTS ---
+# If the primary model hasn't answered by its HEDGE_PERCENTILE latency, the same
+# request also goes to the secondary model; the first valid answer wins.
+# An empty HEDGE_MODEL_ID disables hedging.
+HEDGE_MODEL_ID = os.getenv("HEDGE_MODEL_ID", "deepseek/deepseek-chat-v3-0324:free")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.9"))
+HEDGE_INITIAL_DELAY_SECONDS = float(os.getenv("HEDGE_INITIAL_DELAY_SECONDS", "8"))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "1"))
+HEDGE_MAX_DELAY_SECONDS = float(os.getenv("HEDGE_MAX_DELAY_SECONDS", "20"))
+
 # --- LOGGING CONFIGURATION ---
 # This sets up the logger to print nicely formatted messages with timestamps
 logging.basicConfig(
@@ -31,22 +58,27 @@ class FilmEntry(BaseModel):
 
 class TitleResponse(BaseModel):
     titles: list[FilmEntry]
+    # Set on the hard fallback list so callers never cache it as a real answer
+    from_fallback: bool = Field(default=False, exclude=True)
 
 class TitleGenerationLayer:
-    def __init__(self, cache_file="query_cache.json"):
-        # 1. Single Client: OpenRouter
+    def __init__(self, cache_file="query_cache.json", cache_db=QUERY_CACHE_PATH):
+        # 1. Single Client: OpenRouter (sync for scripts, async for the API)
         self.client = OpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=os.getenv("OPENROUTER_API_KEY"),
         )
+        self.async_client = AsyncOpenAI(
+            base_url="https://openrouter.ai/api/v1",
+            api_key=os.getenv("OPENROUTER_API_KEY"),
+        )
         
         # 2. Model Selection: The "Free" Tier
         self.model_id = "xiaomi/mimo-v2-flash:free" 
+        self.hedge_model_id = HEDGE_MODEL_ID
         
-        # 3. Layer 2 Intel & Cache
+        # 3. Layer 2 Intel
         self.intel = InputIntelligence()
-        self.cache_file = cache_file
-        self.cache = self._load_cache()
 
         # 4. LOCKED SYSTEM PROMPT (Do Not Modify)
         self.system_instructions = """
@@ -106,77 +138,595 @@ class TitleGenerationLayer:
             If your best match only scores 50 points total (e.g., weak semantic link), OUTPUT 50. Do NOT inflate it to 95 just to fill the list. If the user query is gibberish or has NO matches, return low confidence scores (<30).
             """
 
+        # 5. Cache (SQLite, keyed by model + prompt hash + query)
+        self.prompt_hash = hashlib.md5(self.system_instructions.encode()).hexdigest()[:12]
+        self.cache_file = cache_file
+        self.cache = QueryCache(cache_db)
+        self.cache.import_json(self.cache_file)  # one-time, no-op afterwards
+
+        # 6. Canonical cache keys: reworded / reordered repeats share an entry
+        self.canonicalizer = QueryCanonicalizer()
+
+        # 7. Semantic near-duplicates: a close paraphrase reuses a cached answer
+        self.semantic = None
+        if SEMANTIC_CACHE_ENABLED:
+            try:
+                self.semantic = SemanticIndex(max_entries=self.cache.max_entries)
+                self.semantic.add_many(self.canonicalizer.canonicalize(q) for q in self.cache.query_texts())
+            except Exception as e:
+                logger.warning(f"⚠️ Semantic cache disabled: {e}")
+                self.semantic = None
+
+        # 8. Identical concurrent misses share one OpenRouter call
+        self.flights = AsyncSingleFlight()
+        self._sync_flights = SingleFlight()
+
+        # 9. Recent failures / junk / flags, so repeats don't cost upstream calls
+        self.negative = NegativeCache()
+
+        # 10. Background refreshes of stale entries (bounded, off the request path)
+        self.refresh_executor = ThreadPoolExecutor(
+            max_workers=SWR_MAX_CONCURRENT_REFRESHES, thread_name_prefix="motif-swr"
+        )
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self.refresh_stats = {"scheduled": 0, "completed": 0, "failed": 0, "skipped_busy": 0}
+
+        # 11. Token accounting across every OpenRouter call made by this layer
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        self._usage_lock = threading.Lock()
+
+        # 12. Primary latency profile drives the hedge deadline
+        self.primary_latency = LatencyTracker(
+            percentile=HEDGE_PERCENTILE, initial_delay=HEDGE_INITIAL_DELAY_SECONDS,
+            min_delay=HEDGE_MIN_DELAY_SECONDS, max_delay=HEDGE_MAX_DELAY_SECONDS,
+        )
+        self.hedge_stats = {"requests": 0, "hedged": 0, "primary_wins": 0, "secondary_wins": 0}
+
+        # 13. One circuit breaker per model endpoint
+        self.breakers = {model: CircuitBreaker(model) for model in (self.model_id, self.hedge_model_id) if model}
+
     def _get_cache_key(self, text: str) -> str:
-        return hashlib.md5(text.lower().strip().encode()).hexdigest()
+        return make_cache_key(self.canonicalizer.canonicalize(text), self.model_id, self.prompt_hash)
+
+    def _load_from_cache(self, text: str):
+        """
+        Returns cached title dicts for a normalized query. Entries written under
+        older key formats (raw normalized text, legacy JSON) are promoted to the
+        canonical key on first hit.
+        """
+        key = self._get_cache_key(text)
+        entry = self.cache.get(key, allow_stale=True)
+        if entry:
+            self.canonicalizer.record_lookup(text, entry.query)
+            return self._serve_entry(entry, text)
 
-    def _load_cache(self):
-        if os.path.exists(self.cache_file):
-            with open(self.cache_file, "r") as f:
-                return json.load(f)
-        return {}
+        for old_key in (make_cache_key(text, self.model_id, self.prompt_hash), legacy_cache_key(text)):
+            old = self.cache.get(old_key, allow_stale=True) if old_key != key else None
+            if old:
+                self.canonicalizer.record_lookup(text, text)
+                self._save_to_cache(text, old.payload)
+                self.cache.delete(old_key)
+                return self._serve_entry(old, text)
 
-    def _save_to_cache(self, key, data):
-        self.cache[key] = data
-        with open(self.cache_file, "w") as f:
-            json.dump(self.cache, f)
+        self.canonicalizer.record_lookup(text)
+        return self._load_semantic_neighbour(text)
+
+    def _load_semantic_neighbour(self, text: str):
+        """Payload of the closest cached paraphrase, if one clears the similarity threshold."""
+        if self.semantic is None:
+            return None
+        try:
+            match = self.semantic.nearest(self.canonicalizer.canonicalize(text))
+        except Exception as e:
+            logger.warning(f"⚠️ Semantic lookup failed: {e}")
+            return None
+        if not match:
+            return None
+
+        neighbour, score = match
+        entry = self.cache.get(make_cache_key(neighbour, self.model_id, self.prompt_hash), allow_stale=True)
+        if entry is None:
+            # Evicted or expired since it was indexed
+            self.semantic.remove(neighbour)
+            return None
+        logger.info(f"🧭 Semantic Hit: '{text}' ~ '{entry.query}' ({score:.2f})")
+        return self._serve_entry(entry, text)
+
+    def _serve_entry(self, entry, text: str):
+        """Returns the entry's payload; a stale one is also queued for regeneration."""
+        if entry.is_stale:
+            # Regenerate under the query that produced the entry (legacy rows have none)
+            self._schedule_refresh(entry.query or text)
+        return entry.payload
+
+    def _schedule_refresh(self, text: str):
+        key = self._get_cache_key(text)
+        if self.negative.check(key):
+            # Regeneration is backing off; keep serving the stale entry
+            return
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            if len(self._refreshing) >= SWR_MAX_PENDING_REFRESHES:
+                # Still stale next time it is served, so it gets another chance
+                self.refresh_stats["skipped_busy"] += 1
+                return
+            self._refreshing.add(key)
+            self.refresh_stats["scheduled"] += 1
+        try:
+            self.refresh_executor.submit(self._refresh, key, text)
+        except RuntimeError:
+            # Executor already shut down
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key: str, text: str):
+        """Regenerates one stale entry. The query was vetted when first cached, so no moderation."""
+        logger.info(f"♻️ Revalidating stale cache entry: '{text}'")
+        try:
+            result = self._sync_flights.do(key, self._generate, text)
+            self.refresh_stats["failed" if result.from_fallback else "completed"] += 1
+        except Exception as e:
+            self.refresh_stats["failed"] += 1
+            logger.error(f"❌ Revalidation failed for '{text}': {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def revalidation_stats(self) -> dict:
+        return {
+            **self.refresh_stats,
+            "in_progress": len(self._refreshing),
+            "max_concurrent": SWR_MAX_CONCURRENT_REFRESHES,
+        }
+
+    def _save_to_cache(self, text, data):
+        key = self._get_cache_key(text)
+        self.cache.set(key, text, self.model_id, self.prompt_hash, data)
+        self.negative.clear(key)
+        if self.semantic is not None:
+            try:
+                self.semantic.add(self.canonicalizer.canonicalize(text))
+            except Exception as e:
+                logger.warning(f"⚠️ Semantic index update failed: {e}")
+
+    def _cached_response(self, cached) -> Optional[TitleResponse]:
+        try:
+            # Try to validate the cached data against the current model
+            return TitleResponse(titles=[FilmEntry(**t) for t in cached])
+        except Exception as e:
+            # If validation fails (e.g. missing fields), log it and regenerate
+            logger.warning(f"⚠️ Cache invalid, regenerating... Error: {e}")
+            return None
 
     def fetch_titles(self, raw_input: str) -> TitleResponse:
         logger.info(f"🧠 Raw Input Received: '{raw_input}'")
 
-        # 1. Intelligence Check
-        processed = self.intel.classify_intent(raw_input)
+        # 1. Intelligence Check (local)
+        processed = self.intel.preprocess(raw_input)
         if processed.intent == QueryIntent.LOW_SIGNAL:
             logger.warning(f"Low signal query detected: '{raw_input}'")
             return self._get_hard_fallback()
 
-        # 2. Cache Check (Updated with Error Handling)
-        cache_key = self._get_cache_key(processed.normalized_text)
-        if cache_key in self.cache:
-            try:
-                # Try to validate the cached data against the current model
-                cached_titles = [FilmEntry(**t) for t in self.cache[cache_key]]
+        # 2. Cache Check. Cached queries were vetted when generated, so no moderation call.
+        cached = self._load_from_cache(processed.normalized_text)
+        if cached is not None:
+            response = self._cached_response(cached)
+            if response:
                 logger.info(f"🚀 Cache Hit: '{processed.normalized_text}'")
-                return TitleResponse(titles=cached_titles)
-            except Exception as e:
-                # If validation fails (e.g. missing fields), log it and regenerate
-                logger.warning(f"⚠️ Cache invalid for '{processed.normalized_text}', regenerating... Error: {e}")
-                # We do NOT return here; we let it fall through to step 3
+                return response
+
+        # 3. Negative Cache (recently flagged or failing: no upstream calls)
+        if self.is_negative(processed.normalized_text):
+            return self._get_hard_fallback()
 
-        # 3. Generation
-        logger.info(f"📡 Calling OpenRouter for query: '{processed.normalized_text}'...")
+        # 4. Moderation (verdict-cached, deadline-bound)
+        is_safe, reason = self.intel.moderate(processed.normalized_text)
+        if not is_safe:
+            logger.warning(f"🚫 Moderation flagged '{raw_input}': {reason}")
+            self.negative.record_flagged(self._get_cache_key(processed.normalized_text))
+            return self._get_hard_fallback()
+
+        # 5. Generation (coalesced: concurrent identical queries wait on the first caller)
+        return self._sync_flights.do(
+            self._get_cache_key(processed.normalized_text),
+            self._generate,
+            processed.normalized_text,
+        )
+
+    def _messages(self, normalized_text: str) -> list:
+        return [
+            {"role": "system", "content": self.system_instructions},
+            {"role": "user", "content": normalized_text},
+        ]
+
+    def _parse_completion(self, raw_content: str) -> TitleResponse:
+        # --- DEBUG LOGGING: RAW LLM OUTPUT ---
+        # This shows exactly what the model sent back
+        logger.info(f"📝 RAW LLM JSON:\n{raw_content}") 
+        # -------------------------------------
+
+        cleaned_data = json_repair.loads(raw_content)
+        return TitleResponse.model_validate(cleaned_data)
+
+    def _generate(self, normalized_text: str) -> TitleResponse:
+        breaker = self.breakers[self.model_id]
+        if not breaker.allow():
+            logger.warning(f"🔌 Circuit open for {self.model_id}, skipping generation")
+            return self._fallback_response(normalized_text)
+
+        logger.info(f"📡 Calling OpenRouter for query: '{normalized_text}'...")
+        start = time.monotonic()
         try:
             response = self.client.chat.completions.create(
                 model=self.model_id,
-                messages=[
-                    {"role": "system", "content": self.system_instructions},
-                    {"role": "user", "content": processed.normalized_text},
-                ],
+                messages=self._messages(normalized_text),
                 response_format={'type': 'json_object'},
                 temperature=0.3
             )
             
-            raw_content = response.choices[0].message.content
-            
-            # --- DEBUG LOGGING: RAW LLM OUTPUT ---
-            # This shows exactly what the model sent back
-            logger.info(f"📝 RAW LLM JSON:\n{raw_content}") 
-            # -------------------------------------
-
-            cleaned_data = json_repair.loads(raw_content)
-            parsed_response = TitleResponse.model_validate(cleaned_data)
-            
-            self._save_to_cache(cache_key, [t.model_dump() for t in parsed_response.titles])
+            self._record_usage(response.usage)
+            parsed_response = self._parse_completion(response.choices[0].message.content)
+            if not parsed_response.titles:
+                raise ValueError(f"{self.model_id} returned no titles")
+            breaker.record_success(time.monotonic() - start)
+            self._save_to_cache(normalized_text, [t.model_dump() for t in parsed_response.titles])
             
             logger.info(f"✅ Successfully generated {len(parsed_response.titles)} titles.")
             return parsed_response
 
         except Exception as e:
             logger.error(f"❌ OpenRouter Error: {e}", exc_info=True)
+            breaker.record_failure()
+            self.record_failure(normalized_text)
+            return self._fallback_response(normalized_text)
+
+    def is_negative(self, normalized_text: str) -> bool:
+        """True while the query is in the negative cache (skip moderation and generation)."""
+        kind = self.negative.check(self._get_cache_key(normalized_text))
+        if kind:
+            logger.warning(f"⛔ Negative Cache Hit ({kind}): '{normalized_text}'")
+        return kind is not None
+
+    def record_failure(self, normalized_text: str):
+        backoff = self.negative.record_failure(self._get_cache_key(normalized_text))
+        logger.warning(f"⏳ Backing off '{normalized_text}' for {backoff:.0f}s")
+
+    # --- ASYNC PATH (API) ---
+
+    async def afetch_titles(self, raw_input: str) -> TitleResponse:
+        """
+        Async fetch_titles: the request never holds a thread while waiting on
+        OpenRouter. Cache hits skip moderation; on a miss moderation runs
+        alongside generation and a flagged query's result is dropped.
+        """
+        logger.info(f"🧠 Raw Input Received: '{raw_input}'")
+
+        # 1. Intelligence Check (local)
+        processed = self.intel.preprocess(raw_input)
+        if processed.intent == QueryIntent.LOW_SIGNAL:
+            logger.warning(f"Low signal query detected: '{raw_input}'")
+            return self._get_hard_fallback()
+
+        # 2. Cache Check (SQLite work goes to the DB executor)
+        cached = await run_db(self._load_from_cache, processed.normalized_text)
+        if cached is not None:
+            response = self._cached_response(cached)
+            if response:
+                logger.info(f"🚀 Cache Hit: '{processed.normalized_text}'")
+                return response
+
+        # 3. Negative Cache (recently flagged or failing: no upstream calls)
+        if self.is_negative(processed.normalized_text):
             return self._get_hard_fallback()
 
+        # 4. Moderation + Generation (coalesced)
+        return await self.flights.do(
+            self._get_cache_key(processed.normalized_text),
+            self._agenerate_vetted,
+            processed.normalized_text,
+        )
+
+    async def _agenerate_vetted(self, normalized_text: str) -> TitleResponse:
+        """Runs moderation and generation in parallel; only a cleared result is cached."""
+        safety = asyncio.create_task(self.intel.amoderate(normalized_text))
+        generation = asyncio.create_task(self._agenerate(normalized_text))
+        try:
+            is_safe, reason = await safety
+            if not is_safe:
+                generation.cancel()
+                logger.warning(f"🚫 Moderation flagged '{normalized_text}': {reason}. Dropping generation.")
+                self.negative.record_flagged(self._get_cache_key(normalized_text))
+                return self._get_hard_fallback()
+
+            result = await generation
+        except BaseException:
+            safety.cancel()
+            generation.cancel()
+            raise
+
+        if result.from_fallback:
+            if not self.generation_unavailable():
+                self.record_failure(normalized_text)
+        else:
+            await run_db(self._save_to_cache, normalized_text, [t.model_dump() for t in result.titles])
+        return result
+
+    async def _agenerate(self, normalized_text: str) -> TitleResponse:
+        """
+        One generation, hedged: the secondary model only joins in once the
+        primary is slower than usual (or fails). Does not touch the cache
+        (see _agenerate_vetted).
+        """
+        self.hedge_stats["requests"] += 1
+        try:
+            if not self.hedge_model_id:
+                return await self._acomplete(self.model_id, normalized_text)
+
+            delay = self.primary_latency.hedge_delay()
+            parsed_response, winner = await hedged(
+                lambda: self._acomplete(self.model_id, normalized_text),
+                lambda: self._acomplete_hedge(normalized_text, delay),
+                delay,
+            )
+            self.hedge_stats[f"{winner}_wins"] += 1
+            return parsed_response
+
+        except CircuitOpenError as e:
+            logger.warning(f"🔌 {e}, skipping generation")
+        except Exception as e:
+            logger.error(f"❌ OpenRouter Error: {e}", exc_info=True)
+        # Semantic neighbour / catalog lookups block on SQLite: keep them off the event loop
+        return await run_db(self._fallback_response, normalized_text)
+
+    async def _acomplete_hedge(self, normalized_text: str, delay: float) -> TitleResponse:
+        self.hedge_stats["hedged"] += 1
+        logger.warning(f"🏇 Primary failed or slower than {delay:.1f}s, hedging with {self.hedge_model_id}")
+        return await self._acomplete(self.hedge_model_id, normalized_text)
+
+    async def _acomplete(self, model_id: str, normalized_text: str) -> TitleResponse:
+        """
+        One OpenRouter completion on one model; raises unless it parses to a
+        non-empty TitleResponse. Raises CircuitOpenError without a network
+        call while the model's circuit is open.
+        """
+        breaker = self.breakers[model_id]
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {model_id}")
+
+        logger.info(f"📡 Calling OpenRouter ({model_id}) for query: '{normalized_text}'...")
+        start = time.monotonic()
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=model_id,
+                messages=self._messages(normalized_text),
+                response_format={'type': 'json_object'},
+                temperature=0.3
+            )
+
+            self._record_usage(response.usage)
+            parsed_response = self._parse_completion(response.choices[0].message.content)
+            if not parsed_response.titles:
+                raise ValueError(f"{model_id} returned no titles")
+        except asyncio.CancelledError:
+            breaker.release()  # hedge loser or client gone: no verdict on the model
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        breaker.record_success(time.monotonic() - start)
+        if model_id == self.model_id:
+            self.primary_latency.record(time.monotonic() - start)
+        logger.info(f"✅ Successfully generated {len(parsed_response.titles)} titles ({model_id}).")
+        return parsed_response
+
+    def hedging_stats(self) -> dict:
+        return {
+            "secondary_model": self.hedge_model_id or None,
+            **self.hedge_stats,
+            "primary_latency": self.primary_latency.stats(),
+        }
+
+    async def astream_titles(self, raw_input: str, top_k: Optional[int] = None):
+        """
+        Streaming afetch_titles: yields each FilmEntry as soon as its JSON
+        object is complete instead of after the whole completion.
+        - Cache hits are replayed directly (already vetted, no moderation call).
+        - On a miss, moderation runs alongside the first tokens and nothing is
+          yielded before it clears.
+        - Repeated (title, year) pairs are suppressed.
+        - top_k stops after that many titles and closes the upstream stream.
+        A complete, cleared stream is written to the cache once at the end;
+        a top_k cutoff is not cached, since the list is partial.
+        """
+        logger.info(f"🧠 Raw Input Received (stream): '{raw_input}'")
+        processed = self.intel.preprocess(raw_input)
+        normalized_text = processed.normalized_text
+        if processed.intent == QueryIntent.LOW_SIGNAL:
+            logger.warning(f"Low signal query detected: '{raw_input}'")
+            source = self._astream_fallback()
+        else:
+            cached = await run_db(self._load_from_cache, normalized_text)
+            if cached is not None:
+                logger.info(f"🚀 Cache Hit (stream): '{normalized_text}'")
+                source = self._astream_cached(cached)
+            elif self.is_negative(normalized_text):
+                source = self._astream_fallback()
+            else:
+                source = self._astream_generated(normalized_text)
+
+        seen = set()
+        emitted = 0
+        try:
+            async for film in source:
+                key = (film.title.strip().lower(), film.year)
+                if key in seen:
+                    logger.warning(f"🛑 DUPLICATE CAUGHT: Dropping '{film.title}' ({film.year})")
+                    continue
+                seen.add(key)
+                yield film
+                emitted += 1
+                if top_k and emitted >= top_k:
+                    logger.info(f"✂️ Stream cut off after top_k={top_k} titles")
+                    return
+        finally:
+            await source.aclose()
+
+    async def _astream_cached(self, cached):
+        for t in cached:
+            try:
+                yield FilmEntry(**t)
+            except Exception:
+                logger.warning(f"⚠️ Skipping malformed cached title: {t}")
+
+    async def _astream_fallback(self, normalized_text: Optional[str] = None):
+        """Titles without the LLM: degraded neighbour / catalog match for the query, else the hard fallback."""
+        response = await run_db(self._fallback_response, normalized_text) if normalized_text else self._get_hard_fallback()
+        for film in response.titles:
+            yield film
+
+    async def _astream_generated(self, normalized_text: str):
+        safety = asyncio.create_task(self.intel.amoderate(normalized_text))
+        parser = TitleStreamParser()
+        generated = []
+        seen = set()
+        # A completion that parses to zero titles is a failure, not an empty success
+        completions = self.astream_completion(normalized_text, accept=lambda: bool(generated))
+        try:
+            async for delta in completions:
+                for obj in parser.feed(delta):
+                    try:
+                        film = FilmEntry(**obj)
+                    except Exception:
+                        logger.warning(f"⚠️ Skipping malformed streamed title: {obj}")
+                        continue
+
+                    is_safe, reason = await safety  # instant after the first title
+                    if not is_safe:
+                        logger.warning(f"🚫 Moderation flagged '{normalized_text}': {reason}. Dropping stream.")
+                        self.negative.record_flagged(self._get_cache_key(normalized_text))
+                        async for fallback_film in self._astream_fallback():
+                            yield fallback_film
+                        return
+
+                    key = (film.title.strip().lower(), film.year)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    generated.append(film)
+                    yield film
+        except CircuitOpenError as e:
+            logger.warning(f"🔌 {e}, skipping generation")
+            async for film in self._astream_fallback(normalized_text):
+                yield film
+            return
+        except Exception as e:
+            logger.error(f"❌ OpenRouter Stream Error: {e}", exc_info=True)
+            self.record_failure(normalized_text)
+            if not generated:
+                async for film in self._astream_fallback(normalized_text):
+                    yield film
+            return
+        finally:
+            safety.cancel()
+            await completions.aclose()
+
+        if generated:
+            logger.info(f"✅ Streamed {len(generated)} titles.")
+            await run_db(self._save_to_cache, normalized_text, [t.model_dump() for t in generated])
+
+    async def astream_completion(self, normalized_text: str, accept: Optional[Callable[[], bool]] = None):
+        """
+        Yields the raw content deltas of a streamed OpenRouter completion.
+        Raises CircuitOpenError up front while the primary model's circuit is open.
+        `accept` is asked once the stream has ended (the caller has parsed every
+        delta by then); if it says no, the call counts as a breaker failure and
+        ValueError is raised (as in _acomplete).
+        """
+        breaker = self.breakers[self.model_id]
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {self.model_id}")
+
+        logger.info(f"📡 Streaming OpenRouter for query: '{normalized_text}'...")
+        start = time.monotonic()
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model_id,
+                messages=self._messages(normalized_text),
+                response_format={'type': 'json_object'},
+                temperature=0.3,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            try:
+                async for chunk in stream:
+                    if getattr(chunk, "usage", None):
+                        self._record_usage(chunk.usage)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Early exit (top_k, client gone) drops the HTTP stream right away
+                await stream.close()
+            if accept is not None and not accept():
+                raise ValueError(f"{self.model_id} returned no titles")
+        except (asyncio.CancelledError, GeneratorExit):
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success(time.monotonic() - start)
+
+    def generation_unavailable(self) -> bool:
+        """True while every model's circuit is open (failures then say nothing about the query)."""
+        return all(breaker.state == OPEN for breaker in self.breakers.values())
+
+    def breaker_stats(self) -> dict:
+        return {model: breaker.stats() for model, breaker in self.breakers.items()}
+
+    def _fallback_response(self, normalized_text: Optional[str] = None) -> TitleResponse:
+        """
+        Best answer without the LLM, cheapest first: a looser semantic
+        neighbour from the cache, then the query itself as a catalog title,
+        then the hard fallback list. Always marked from_fallback.
+        """
+        if normalized_text and self.semantic is not None:
+            try:
+                match = self.semantic.nearest(
+                    self.canonicalizer.canonicalize(normalized_text), threshold=SEMANTIC_DEGRADED_THRESHOLD
+                )
+                entry = self.cache.get(make_cache_key(match[0], self.model_id, self.prompt_hash), True) if match else None
+                response = self._cached_response(entry.payload) if entry else None
+                if response:
+                    logger.warning(f"🧭 Degraded answer for '{normalized_text}' from '{entry.query}' ({match[1]:.2f})")
+                    response.from_fallback = True
+                    return response
+            except Exception as e:
+                logger.warning(f"⚠️ Degraded neighbour lookup failed: {e}")
+
+        if normalized_text:
+            row = find_movie_metadata(normalized_text)
+            if row:
+                logger.warning(f"🎞️ Degraded answer for '{normalized_text}': catalog title match")
+                return TitleResponse(from_fallback=True, titles=[
+                    {"title": row["title"], "year": int(row.get("year") or 0), "confidence_score": 60}
+                ])
+
+        return self._get_hard_fallback()
+
+    def _record_usage(self, usage):
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            if usage is None:
+                return
+            for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                self.usage[field] += getattr(usage, field, 0) or 0
+
     def _get_hard_fallback(self) -> TitleResponse:
         logger.warning(">> Triggering Hard Fallback List")
-        return TitleResponse(titles=[
+        return TitleResponse(from_fallback=True, titles=[
             {"title": "Inception", "year": 2010, "confidence_score": 90},
             {"title": "The Matrix", "year": 1999, "confidence_score": 85},
             {"title": "Blade Runner 2049", "year": 2017, "confidence_score": 80}
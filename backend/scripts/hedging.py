@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+class LatencyTracker:
+    """
+    Rolling window of recent call latencies. hedge_delay() is the chosen
+    percentile of the window, clamped, so the hedge fires only for the slow
+    tail instead of at a fixed guess.
+    """
+    def __init__(self, window: int = 200, percentile: float = 0.9, min_samples: int = 20,
+                 initial_delay: float = 8.0, min_delay: float = 1.0, max_delay: float = 20.0):
+        self.samples = deque(maxlen=window)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self) -> float:
+        if len(self.samples) < self.min_samples:
+            return self.initial_delay
+        return min(self.max_delay, max(self.min_delay, self.quantile(self.percentile)))
+
+    def stats(self) -> dict:
+        p50, p90, p99 = (self.quantile(q) for q in (0.5, 0.9, 0.99))
+        return {
+            "samples": len(self.samples),
+            "p50_s": round(p50, 3) if p50 is not None else None,
+            "p90_s": round(p90, 3) if p90 is not None else None,
+            "p99_s": round(p99, 3) if p99 is not None else None,
+            "hedge_delay_s": round(self.hedge_delay(), 3),
+        }
+
+async def hedged(primary: Callable[[], Awaitable[Any]], secondary: Callable[[], Awaitable[Any]],
+                 delay: float) -> Tuple[Any, str]:
+    """
+    Runs primary(); if it hasn't succeeded within `delay` seconds (or fails
+    first), also runs secondary(). Returns (result, "primary" | "secondary")
+    for the first call that succeeds and cancels the other. Raises the last
+    error only when both fail.
+    """
+    tasks = {asyncio.ensure_future(primary()): "primary"}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        for task in done:
+            if task.exception() is None:
+                return task.result(), "primary"
+
+        tasks[asyncio.ensure_future(secondary())] = "secondary"
+        pending = {task for task in tasks if not task.done()}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), tasks[task]
+                error = task.exception()
+
+        # Both failed: surface the primary's error if it has one
+        for task, name in tasks.items():
+            if name == "primary" and task.exception() is not None:
+                raise task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
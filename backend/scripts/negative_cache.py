@@ -0,0 +1,75 @@
+import os
+import time
+import threading
+from typing import Optional
+
+# --- CONFIG ---
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "20000"))
+FLAGGED_TTL_SECONDS = int(os.getenv("NEGATIVE_FLAGGED_TTL_SECONDS", "900"))
+# Upstream failures back off exponentially: base, 2x base, 4x base... up to the cap
+FAILURE_BACKOFF_BASE_SECONDS = float(os.getenv("NEGATIVE_FAILURE_BACKOFF_BASE_SECONDS", "5"))
+FAILURE_BACKOFF_MAX_SECONDS = float(os.getenv("NEGATIVE_FAILURE_BACKOFF_MAX_SECONDS", "300"))
+
+FLAGGED = "flagged"
+FAILURE = "failure"
+
+class NegativeCache:
+    """
+    Short-lived memory of queries that produced no usable answer, so retries
+    and bots repeating the same string get the fallback without another
+    moderation call or OpenRouter attempt. Flagged verdicts get a flat TTL;
+    upstream failures back off exponentially per key and are cleared by the
+    first success. In-process, bounded, oldest out first. Low-signal queries
+    are not stored: the local intent check rejects them before any lookup.
+    """
+    def __init__(self, max_entries: int = NEGATIVE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: dict = {}    # key -> (kind, consecutive_failures, blocked_until)
+        self._lock = threading.Lock()
+        self.hits = {FLAGGED: 0, FAILURE: 0}
+        self.recorded = {FLAGGED: 0, FAILURE: 0}
+
+    def check(self, key: str) -> Optional[str]:
+        """Kind of the active negative entry for key, or None."""
+        item = self._entries.get(key)
+        if item is None or item[2] <= time.time():
+            return None
+        self.hits[item[0]] += 1
+        return item[0]
+
+    def record_flagged(self, key: str):
+        """Remembers a moderation flag for FLAGGED_TTL_SECONDS."""
+        self._store(key, (FLAGGED, 0, time.time() + FLAGGED_TTL_SECONDS))
+
+    def record_failure(self, key: str) -> float:
+        """Counts one upstream failure; returns the backoff now in effect (seconds)."""
+        with self._lock:
+            item = self._entries.get(key)
+            failures = item[1] + 1 if item and item[0] == FAILURE else 1
+        backoff = min(FAILURE_BACKOFF_BASE_SECONDS * 2 ** (failures - 1), FAILURE_BACKOFF_MAX_SECONDS)
+        self._store(key, (FAILURE, failures, time.time() + backoff))
+        return backoff
+
+    def clear(self, key: str):
+        """A success ends any backoff for the key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _store(self, key: str, item: tuple):
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                # Oldest insertion first (dicts keep insertion order)
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = item
+            self.recorded[item[0]] += 1
+
+    def stats(self) -> dict:
+        now = time.time()
+        active = sum(1 for _, _, until in list(self._entries.values()) if until > now)
+        return {
+            "entries": len(self._entries),
+            "active": active,
+            "hits": dict(self.hits),
+            "recorded": dict(self.recorded),
+        }
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from scripts.db import get_pool, BACKEND_DIR
+
+# --- CONFIG ---
+QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH", os.path.join(BACKEND_DIR, "query_cache.db"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "20000"))
+# Entries are fresh for the TTL, then served stale (while being regenerated)
+# for up to QUERY_CACHE_STALE_SECONDS more before they are really gone.
+QUERY_CACHE_TTL_SECONDS = int(os.getenv("QUERY_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+QUERY_CACHE_STALE_SECONDS = int(os.getenv("QUERY_CACHE_STALE_SECONDS", str(60 * 24 * 3600)))
+# LRU recency is only rewritten when it is older than this, so hot keys
+# don't turn every cache read into a write.
+TOUCH_INTERVAL_SECONDS = 60
+
+logger = logging.getLogger("QueryCache")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_cache (
+    key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    model_id TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_query_cache_accessed ON query_cache(accessed_at);
+CREATE TABLE IF NOT EXISTS cache_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+@dataclass
+class CacheEntry:
+    key: str
+    query: str
+    model_id: str
+    payload: list
+    created_at: float
+    expires_at: Optional[float]
+
+    @property
+    def is_stale(self) -> bool:
+        return self.expires_at is not None and self.expires_at < time.time()
+
+def make_cache_key(normalized_text: str, model_id: str, prompt_hash: str) -> str:
+    """Model and prompt are part of the key, so changing either only invalidates its own entries."""
+    raw = f"{model_id}\x1f{prompt_hash}\x1f{normalized_text.lower().strip()}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+def legacy_cache_key(normalized_text: str) -> str:
+    """Key format of the old query_cache.json (query text only)."""
+    return hashlib.md5(normalized_text.lower().strip().encode()).hexdigest()
+
+class QueryCache:
+    """
+    LLM title cache in a WAL SQLite file. Safe to share between threads
+    (pooled connection per thread) and between uvicorn workers (SQLite
+    locking). Bounded by entry count with LRU eviction, with a per-entry TTL.
+    """
+    LEGACY_MODEL_ID = "legacy-json"
+
+    def __init__(self, path: str = QUERY_CACHE_PATH,
+                 max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+                 ttl_seconds: Optional[int] = QUERY_CACHE_TTL_SECONDS,
+                 stale_seconds: int = QUERY_CACHE_STALE_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.pool = get_pool(path, read_only=False)
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self._listeners = []
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        return self.pool.connection()
+
+    def subscribe(self, listener):
+        """Registers listener(key), called after an entry is written or deleted in this process."""
+        self._listeners.append(listener)
+
+    def _notify(self, key: str):
+        for listener in self._listeners:
+            listener(key)
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """
+        Fresh entry for key, or None. With allow_stale, an expired entry still
+        inside the stale window is returned too (check entry.is_stale).
+        """
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT key, query, model_id, payload, created_at, accessed_at, expires_at "
+            "FROM query_cache WHERE key = ?", (key,)
+        ).fetchone()
+
+        expires_at = row["expires_at"] if row else None
+        if expires_at is not None and expires_at < now:
+            if not allow_stale or expires_at + self.stale_seconds < now:
+                row = None
+        if row is None:
+            self.misses += 1
+            return None
+
+        if now - row["accessed_at"] > TOUCH_INTERVAL_SECONDS:
+            with self._conn() as conn:
+                conn.execute("UPDATE query_cache SET accessed_at = ? WHERE key = ?", (now, key))
+
+        self.hits += 1
+        if expires_at is not None and expires_at < now:
+            self.stale_hits += 1
+        return CacheEntry(
+            key=row["key"],
+            query=row["query"],
+            model_id=row["model_id"],
+            payload=json.loads(row["payload"]),
+            created_at=row["created_at"],
+            expires_at=row["expires_at"],
+        )
+
+    def set(self, key: str, query: str, model_id: str, prompt_hash: str,
+            payload: list, ttl_seconds: Optional[int] = None):
+        """Upserts one entry (O(1), unlike rewriting the whole JSON file) and evicts LRU overflow."""
+        now = time.time()
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = now + ttl if ttl else None
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_cache "
+                "(key, query, model_id, prompt_hash, payload, created_at, accessed_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, query, model_id, prompt_hash, json.dumps(payload), now, now, expires_at),
+            )
+            self._evict(conn)
+        self._notify(key)
+
+    def delete(self, key: str):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM query_cache WHERE key = ?", (key,))
+        self._notify(key)
+
+    def _evict(self, conn):
+        count = conn.execute("SELECT COUNT(*) FROM query_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM query_cache WHERE key IN "
+                "(SELECT key FROM query_cache ORDER BY accessed_at LIMIT ?)", (overflow,)
+            )
+            self.evictions += overflow
+
+    def purge_expired(self) -> int:
+        """Deletes entries past their stale window (stale ones are still servable)."""
+        with self._conn() as conn:
+            cursor = conn.execute(
+                "DELETE FROM query_cache WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time() - self.stale_seconds,),
+            )
+        return cursor.rowcount
+
+    def import_json(self, json_path: str) -> int:
+        """
+        One-time import of a legacy query_cache.json. Entries keep their old
+        key (md5 of the query text) and are promoted to a full key on first hit.
+        Returns the number of imported entries (0 if already imported).
+        """
+        if not os.path.exists(json_path):
+            return 0
+
+        marker = f"imported:{os.path.abspath(json_path)}"
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM cache_meta WHERE name = ?", (marker,)).fetchone():
+            return 0
+
+        with open(json_path, "r") as f:
+            legacy = json.load(f)
+
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO query_cache "
+                "(key, query, model_id, prompt_hash, payload, created_at, accessed_at, expires_at) "
+                "VALUES (?, '', ?, '', ?, ?, ?, ?)",
+                [(key, self.LEGACY_MODEL_ID, json.dumps(titles), now, now, expires_at)
+                 for key, titles in legacy.items()],
+            )
+            conn.execute("INSERT INTO cache_meta (name, value) VALUES (?, ?)", (marker, str(now)))
+            self._evict(conn)
+
+        logger.info(f"📦 Imported {len(legacy)} legacy cache entries from {json_path}")
+        return len(legacy)
+
+    def query_texts(self):
+        """Yields the stored query text of every entry (legacy imports have none), least recently used first."""
+        for row in self._conn().execute("SELECT query FROM query_cache WHERE query != '' ORDER BY accessed_at"):
+            yield row[0]
+
+    def stats(self) -> dict:
+        entries = self._conn().execute("SELECT COUNT(*) FROM query_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
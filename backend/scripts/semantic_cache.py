@@ -0,0 +1,189 @@
+import os
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# --- CONFIG ---
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+# Cosine similarity a cached query needs to answer a new one
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+# Looser bar used only when generation is unavailable (circuit open): a rough
+# neighbour beats the generic fallback list.
+SEMANTIC_DEGRADED_THRESHOLD = float(os.getenv("SEMANTIC_DEGRADED_THRESHOLD", "0.6"))
+# Same bound as the query cache by default: the index never outgrows what it points at
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", os.getenv("QUERY_CACHE_MAX_ENTRIES", "20000")))
+# "hashing" (local char n-grams, no network) or "ollama" (embedding model on the enrichment box)
+SEMANTIC_CACHE_EMBEDDER = os.getenv("SEMANTIC_CACHE_EMBEDDER", "hashing")
+SEMANTIC_CACHE_OLLAMA_MODEL = os.getenv("SEMANTIC_CACHE_OLLAMA_MODEL", "nomic-embed-text")
+HASHING_DIMENSIONS = 1024
+NGRAM_SIZES = (3, 4)
+
+class HashingEmbedder:
+    """
+    Char n-gram hashing vectorizer: no model, no vocabulary, microseconds per
+    query. Catches reordered and inflected rewordings ("lonely neon city nights"
+    / "lonely neon nights in the city"), not true synonyms.
+    """
+    name = "hashing"
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _features(self, text: str):
+        for word in text.split():
+            yield word, 2.0
+            padded = f" {word} "
+            for n in NGRAM_SIZES:
+                for i in range(len(padded) - n + 1):
+                    yield padded[i:i + n], 1.0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                h = zlib.crc32(feature.encode())
+                # Signed hashing keeps collisions from only ever adding similarity
+                vectors[row, h % self.dimensions] += weight if h & 0x80000000 else -weight
+        return vectors
+
+class OllamaEmbedder:
+    """Embeddings from the local Ollama server (same instance the enrichment jobs use)."""
+    name = "ollama"
+
+    def __init__(self, model: str = SEMANTIC_CACHE_OLLAMA_MODEL):
+        import ollama
+        self.client = ollama.Client()
+        self.model = model
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        response = self.client.embed(model=self.model, input=texts)
+        return np.asarray(response["embeddings"], dtype=np.float32)
+
+def make_embedder(kind: str = SEMANTIC_CACHE_EMBEDDER):
+    if kind == "ollama":
+        return OllamaEmbedder()
+    return HashingEmbedder()
+
+class SemanticIndex:
+    """
+    Nearest-neighbour lookup over cached queries. Vectors are L2-normalized
+    rows of one NumPy matrix, so a lookup is a single mat-vec product.
+    Stores canonical query texts; callers resolve a hit back to its cache entry
+    and remove() it if the entry has since been evicted.
+    Bounded like the query cache it mirrors: past max_entries the least
+    recently used text is dropped and its row reused, so memory and the
+    per-lookup product never grow beyond max_entries rows.
+    """
+    def __init__(self, embedder=None, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.embedder = embedder or make_embedder()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._texts: List[Optional[str]] = []   # row -> text (None while the row is free)
+        self._rows: OrderedDict = OrderedDict() # text -> row, least recently used first
+        self._free: List[int] = []               # rows to reuse before growing
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add_many(self, texts: Iterable[str]) -> int:
+        with self._lock:
+            new = []
+            for t in dict.fromkeys(t for t in texts if t):
+                if t in self._rows:
+                    self._rows.move_to_end(t)
+                else:
+                    new.append(t)
+        # Only the most recent max_entries would survive anyway
+        new = new[-self.max_entries:]
+        if not new:
+            return 0
+        vectors = self._normalize_rows(self.embedder.embed(new))
+
+        with self._lock:
+            for text, vector in zip(new, vectors):
+                if text in self._rows:  # added by another thread meanwhile
+                    self._rows.move_to_end(text)
+                    continue
+                row = self._take_row(vector.shape[0])
+                self._matrix[row] = vector
+                self._texts[row] = text
+                self._rows[text] = row
+        return len(new)
+
+    def _take_row(self, dimensions: int) -> int:
+        """A free row for one new vector: reused, evicted (LRU) or grown. Caller holds the lock."""
+        if self._free:
+            return self._free.pop()
+        if len(self._rows) >= self.max_entries:
+            _, row = self._rows.popitem(last=False)
+            self.evictions += 1
+            return row
+        if self._matrix is None:
+            self._matrix = np.zeros((min(64, self.max_entries), dimensions), dtype=np.float32)
+        row = len(self._texts)
+        if row >= self._matrix.shape[0]:
+            # Amortized growth, capped at max_entries; rows past len(self._texts) are unused
+            grown = np.zeros((min(self.max_entries, self._matrix.shape[0] * 2), self._matrix.shape[1]), dtype=np.float32)
+            grown[:row] = self._matrix[:row]
+            self._matrix = grown
+        self._texts.append(None)
+        return row
+
+    def add(self, text: str):
+        self.add_many([text])
+
+    def remove(self, text: str):
+        with self._lock:
+            row = self._rows.pop(text, None)
+            if row is not None:
+                self._matrix[row] = 0.0
+                self._texts[row] = None
+                self._free.append(row)
+
+    def nearest(self, text: str, threshold: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """Best cached query at or above the threshold (default: self.threshold), as (text, similarity)."""
+        self.lookups += 1
+        if not text:
+            return None
+        query = self._normalize_rows(self.embedder.embed([text]))[0]
+        with self._lock:
+            count = len(self._texts)
+            if not count:
+                return None
+            scores = self._matrix[:count] @ query
+            row = int(np.argmax(scores))
+            score = float(scores[row])
+            match = self._texts[row]
+
+            if match is None or match == text or score < (self.threshold if threshold is None else threshold):
+                return None
+            self._rows.move_to_end(match)
+        self.hits += 1
+        return match, score
+
+    def stats(self) -> dict:
+        return {
+            "embedder": self.embedder.name,
+            "entries": len(self._rows),
+            "max_entries": self.max_entries,
+            "rows": len(self._texts),
+            "evictions": self.evictions,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+        }
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    function, everyone who arrives while it is running waits on the same
+    future and gets the same result (or exception).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: dict = {}   # key -> Future
+        self._waiting: dict = {}    # key -> callers currently parked on it
+        self.leaders = 0
+        self.coalesced = 0
+        self.peak_waiters = 0
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+                self._waiting[key] = self._waiting.get(key, 0) + 1
+                self.peak_waiters = max(self.peak_waiters, self._waiting[key])
+
+        if not leader:
+            try:
+                return future.result()
+            finally:
+                with self._lock:
+                    self._waiting[key] -= 1
+                    if not self._waiting[key]:
+                        del self._waiting[key]
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "waiting_now": sum(self._waiting.values()),
+            "leaders": self.leaders,
+            "coalesced_waiters": self.coalesced,
+            "peak_waiters": self.peak_waiters,
+        }
+
+class AsyncSingleFlight:
+    """
+    asyncio flavour of SingleFlight for the async API path.
+    The shared work runs as its own task and callers await it through
+    shield(), so one client disconnecting never cancels it for the others.
+    Only used from a single event loop, so no locking is needed.
+    """
+    def __init__(self):
+        self._inflight: dict = {}   # key -> asyncio.Task
+        self._waiting: dict = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.peak_waiters = 0
+
+    async def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        task = self._inflight.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, key=key: self._inflight.pop(key, None))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            self._waiting[key] = self._waiting.get(key, 0) + 1
+            self.peak_waiters = max(self.peak_waiters, self._waiting[key])
+
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if not leader:
+                self._waiting[key] -= 1
+                if not self._waiting[key]:
+                    del self._waiting[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "waiting_now": sum(self._waiting.values()),
+            "leaders": self.leaders,
+            "coalesced_waiters": self.coalesced,
+            "peak_waiters": self.peak_waiters,
+        }
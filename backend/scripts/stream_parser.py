@@ -0,0 +1,67 @@
+import json
+from typing import List
+
+import json_repair
+
+class TitleStreamParser:
+    """
+    Incremental parser for a streamed `{"titles": [{...}, {...}]}` completion.
+    feed() takes raw text deltas and returns every title object that became
+    syntactically complete, so callers don't wait for the closing bracket.
+    Also accepts a bare top-level array and ignores text before the first
+    bracket (stray prose or a ```json fence).
+    """
+    def __init__(self):
+        self._stack: List[str] = []     # open containers: '{' or '['
+        self._in_string = False
+        self._escape = False
+        self._item: List[str] = []      # chars of the title object being captured
+        self._capturing = False
+        self.emitted = 0
+
+    def _is_title_slot(self) -> bool:
+        # A title object opens directly inside the titles array:
+        # {"titles": [ HERE ]}  or a bare  [ HERE ]
+        return self._stack in (["{", "["], ["["])
+
+    def feed(self, chunk: str) -> List[dict]:
+        completed = []
+        for ch in chunk:
+            if self._capturing:
+                self._item.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                if self._stack:
+                    self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and not self._capturing and self._is_title_slot():
+                    self._capturing = True
+                    self._item = [ch]
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._capturing and ch == "}" and self._is_title_slot():
+                    self._capturing = False
+                    obj = self._decode("".join(self._item))
+                    if isinstance(obj, dict):
+                        completed.append(obj)
+                        self.emitted += 1
+        return completed
+
+    @staticmethod
+    def _decode(text: str):
+        try:
+            return json.loads(text)
+        except ValueError:
+            # Same leniency as the non-streaming path (trailing commas, quotes...)
+            return json_repair.loads(text)
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Imported as `scripts.tmdb_client` or as plain `tmdb_client` by the loaders, like db.py.
+try:
+    from scripts.db import get_pool, BACKEND_DIR
+except ImportError:
+    from db import get_pool, BACKEND_DIR
+
+logger = logging.getLogger("TMDBClient")
+
+# --- CONFIG ---
+TMDB_BASE_URL = "https://api.themoviedb.org/3"
+TMDB_CACHE_PATH = os.getenv("TMDB_CACHE_PATH", os.path.join(BACKEND_DIR, "tmdb_cache.db"))
+# Younger than this: served from disk without asking. Older: revalidated (ETag / Last-Modified).
+TMDB_CACHE_MAX_AGE_SECONDS = int(os.getenv("TMDB_CACHE_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+# Offline replay: only the cache answers, the network is never touched (re-runs, tests).
+TMDB_OFFLINE = os.getenv("TMDB_OFFLINE", "0") == "1"
+TMDB_RATE_PER_SECOND = float(os.getenv("TMDB_RATE", "10"))   # network requests only; cache hits are free
+TMDB_POOL_SIZE = int(os.getenv("TMDB_POOL_SIZE", "8"))
+TMDB_TIMEOUT_SECONDS = float(os.getenv("TMDB_TIMEOUT_SECONDS", "10"))
+
+# Responses worth replaying: the data, and "this id does not exist"
+CACHEABLE_STATUSES = (200, 404)
+OFFLINE_MISS = 0  # status of a TMDBResponse when offline mode has nothing cached
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tmdb_responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB,
+    fetched_at REAL NOT NULL
+);
+"""
+
+@dataclass
+class TMDBResponse:
+    status: int
+    data: Optional[dict]
+    source: str   # "cache", "revalidated", "network", "stale" or "offline"
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200 and self.data is not None
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads."""
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+def cache_key(url: str, params: dict) -> str:
+    """URL + sorted params, without the api_key (rotating the key keeps the cache)."""
+    canonical = json.dumps({k: str(v) for k, v in params.items() if k != "api_key"}, sort_keys=True)
+    return hashlib.sha256(f"{url}?{canonical}".encode()).hexdigest()
+
+class TMDBClient:
+    """
+    The one way the backend talks to TMDB. A keep-alive Session shared by
+    all threads, a rate limit that only applies to real network calls, and
+    a persistent response cache in SQLite (zlib-compressed JSON):
+    fresh entries are replayed, stale ones are revalidated with
+    If-None-Match / If-Modified-Since (a 304 costs no body), and if TMDB is
+    unreachable a stale entry is still served. In offline mode only the
+    cache answers; misses come back with status OFFLINE_MISS.
+    """
+    def __init__(self, api_key: Optional[str] = None, cache_path: str = TMDB_CACHE_PATH,
+                 offline: bool = TMDB_OFFLINE, max_age: int = TMDB_CACHE_MAX_AGE_SECONDS,
+                 rate: float = TMDB_RATE_PER_SECOND, pool_size: int = TMDB_POOL_SIZE,
+                 timeout: float = TMDB_TIMEOUT_SECONDS):
+        self.api_key = api_key or os.getenv("TMDB_API_KEY")
+        self.offline = offline
+        self.max_age = max_age
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate)
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.pool = get_pool(cache_path, read_only=False)
+        conn = self.pool.connection()
+        conn.executescript(SCHEMA)
+        conn.commit()
+        self.counts = {"cache": 0, "revalidated": 0, "network": 0, "stale": 0, "offline_misses": 0, "errors": 0}
+
+    # --- ENDPOINTS ---
+    def movie(self, tmdb_id: int, append_to_response: Optional[str] = None,
+              language: str = "en-US") -> TMDBResponse:
+        params = {"language": language}
+        if append_to_response:
+            params["append_to_response"] = append_to_response
+        return self.get(f"/movie/{tmdb_id}", params)
+
+    def search_movie(self, title: str, year: Optional[int] = None) -> TMDBResponse:
+        params = {"query": title, "include_adult": "false"}
+        if year:
+            params["year"] = year
+        return self.get("/search/movie", params)
+
+    # --- CORE ---
+    def get(self, path: str, params: Optional[dict] = None) -> TMDBResponse:
+        url = f"{TMDB_BASE_URL}{path}"
+        params = dict(params or {})
+        key = cache_key(url, params)
+        entry = self._load(key)
+
+        if entry and (self.offline or time.time() - entry["fetched_at"] < self.max_age):
+            self.counts["cache"] += 1
+            return TMDBResponse(entry["status"], entry["data"], "cache")
+        if self.offline:
+            self.counts["offline_misses"] += 1
+            return TMDBResponse(OFFLINE_MISS, None, "offline")
+
+        headers = {}
+        if entry and entry["status"] == 200:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            self.limiter.wait()
+            response = self.session.get(url, params={**params, "api_key": self.api_key},
+                                        headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            self.counts["errors"] += 1
+            if entry:
+                logger.warning(f"⚠️ TMDB unreachable, serving stale {path}: {e}")
+                self.counts["stale"] += 1
+                return TMDBResponse(entry["status"], entry["data"], "stale")
+            raise
+
+        if response.status_code == 304 and entry:
+            self._touch(key)
+            self.counts["revalidated"] += 1
+            return TMDBResponse(entry["status"], entry["data"], "revalidated")
+
+        self.counts["network"] += 1
+        data = None
+        if response.status_code == 200:
+            data = response.json()
+        if response.status_code in CACHEABLE_STATUSES:
+            self._store(key, url, params, response, data)
+        elif entry and response.status_code >= 500:
+            self.counts["stale"] += 1
+            return TMDBResponse(entry["status"], entry["data"], "stale")
+        return TMDBResponse(response.status_code, data, "network")
+
+    # --- CACHE ---
+    def _load(self, key: str) -> Optional[dict]:
+        row = self.pool.connection().execute(
+            "SELECT status, etag, last_modified, body, fetched_at FROM tmdb_responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            data = json.loads(zlib.decompress(row["body"])) if row["body"] else None
+        except (zlib.error, ValueError):
+            return None  # corrupt row: refetch and overwrite
+        return {"status": row["status"], "etag": row["etag"], "last_modified": row["last_modified"],
+                "data": data, "fetched_at": row["fetched_at"]}
+
+    def _store(self, key: str, url: str, params: dict, response, data: Optional[dict]):
+        body = zlib.compress(json.dumps(data).encode()) if data is not None else None
+        conn = self.pool.connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tmdb_responses (key, url, params, status, etag, last_modified, body, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, json.dumps(params, sort_keys=True), response.status_code,
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"), body, time.time()))
+
+    def _touch(self, key: str):
+        conn = self.pool.connection()
+        with conn:
+            conn.execute("UPDATE tmdb_responses SET fetched_at = ? WHERE key = ?", (time.time(), key))
+
+    def stats(self) -> dict:
+        row = self.pool.connection().execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM tmdb_responses").fetchone()
+        return {"offline": self.offline, "entries": row[0], "cache_bytes": row[1], **self.counts}
@@ -0,0 +1,166 @@
+"""
+Cache warmer: pre-generates titles for popular queries so a fresh deploy
+starts with a warm query cache instead of sending every first request to the LLM.
+
+Run from backend/:
+    python -m scripts.warm_cache --archetypes
+    python -m scripts.warm_cache --file popular_queries.txt --concurrency 4 --rate 0.5
+    python -m scripts.warm_cache "sigma grindset" "rainy day comfort" --missing-out missing.txt
+
+Queries already in the cache are only pre-hydrated, never regenerated.
+Titles that don't resolve against movies.db are reported (and optionally
+written out as "Title (Year)" lines for the loaders).
+"""
+import time
+import asyncio
+import argparse
+from typing import List, Optional
+
+from tqdm import tqdm
+
+from scripts.generator import TitleGenerationLayer
+from scripts.gatekeeper import QueryIntent
+from scripts.construct_rag import ARCHETYPES
+from scripts.db import load_catalog, find_movies_metadata_batch, find_movie_fuzzy, run_db, close_pools
+from scripts.utils import parse_title_and_year
+
+# --- CONFIG ---
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 1.0  # LLM requests started per second
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart."""
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def load_queries(path: Optional[str], queries: List[str], archetypes: bool) -> List[str]:
+    collected = list(queries)
+    if path:
+        with open(path, "r") as f:
+            collected.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if archetypes:
+        collected.extend(ARCHETYPES)
+    return list(dict.fromkeys(collected))
+
+def prehydrate(titles: List[dict]):
+    """Resolves generated titles against the catalog; returns (matched, missing "Title (Year)")."""
+    keys = []
+    for t in titles:
+        clean_title, parsed_year = parse_title_and_year(t["title"])
+        keys.append((clean_title, parsed_year if parsed_year else t.get("year")))
+
+    rows = find_movies_metadata_batch(keys)
+    missing = []
+    for (title, year), row in zip(keys, rows):
+        if row is None and find_movie_fuzzy(title, year) is None:
+            missing.append(f"{title} ({year})" if year else title)
+    return len(keys) - len(missing), missing
+
+class CacheWarmer:
+    def __init__(self, layer: TitleGenerationLayer, concurrency: int, rate: float, hydrate: bool):
+        self.layer = layer
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = RateLimiter(rate)
+        self.hydrate = hydrate
+        self.report = {"cached": 0, "generated": 0, "failed": 0, "skipped": 0, "matched_titles": 0}
+        self.missing = set()
+
+    async def warm(self, query: str):
+        layer = self.layer
+        processed = layer.intel.preprocess(query)
+        if processed.intent == QueryIntent.LOW_SIGNAL or layer.is_negative(processed.normalized_text):
+            self.report["skipped"] += 1
+            return
+
+        # Exact entry only: a semantic neighbour would leave this query itself cold
+        key = layer._get_cache_key(processed.normalized_text)
+        entry = await run_db(layer.cache.get, key, True)
+        if entry is not None:
+            self.report["cached"] += 1
+            titles = entry.payload
+        else:
+            async with self.semaphore:
+                await self.limiter.wait()
+                result = await layer.flights.do(key, layer._agenerate_vetted, processed.normalized_text)
+            if result.from_fallback:
+                self.report["failed"] += 1
+                return
+            self.report["generated"] += 1
+            titles = [t.model_dump() for t in result.titles]
+
+        if self.hydrate:
+            matched, missing = await run_db(prehydrate, titles)
+            self.report["matched_titles"] += matched
+            self.missing.update(missing)
+
+    async def run(self, queries: List[str]):
+        with tqdm(total=len(queries), desc="Warming", unit="query") as pbar:
+            async def one(query):
+                try:
+                    await self.warm(query)
+                except Exception as e:
+                    self.report["failed"] += 1
+                    tqdm.write(f"   ❌ '{query}': {e}")
+                pbar.update(1)
+                pbar.set_postfix(generated=self.report["generated"], tokens=self.layer.usage["total_tokens"])
+
+            await asyncio.gather(*(one(q) for q in queries))
+
+async def main(args):
+    queries = load_queries(args.file, args.queries, args.archetypes)
+    if not queries:
+        print("❌ No queries given (use --file, --archetypes or positional queries).")
+        return
+
+    hydrate = not args.no_hydrate
+    if hydrate:
+        try:
+            load_catalog()
+        except FileNotFoundError:
+            print("⚠️ movies.db not found, skipping pre-hydration.")
+            hydrate = False
+
+    layer = TitleGenerationLayer()
+    warmer = CacheWarmer(layer, args.concurrency, args.rate, hydrate)
+    start = time.time()
+    try:
+        await warmer.run(queries)
+    finally:
+        await layer.async_client.close()
+        layer.refresh_executor.shutdown(wait=True)
+        close_pools()
+
+    report = warmer.report
+    usage = layer.usage
+    print(f"\n🔥 Warmed {len(queries)} queries in {time.time() - start:.1f}s")
+    print(f"   Already cached: {report['cached']} | Generated: {report['generated']} | "
+          f"Failed: {report['failed']} | Skipped: {report['skipped']}")
+    print(f"   Tokens: {usage['total_tokens']} ({usage['prompt_tokens']} prompt, "
+          f"{usage['completion_tokens']} completion) over {usage['calls']} calls")
+    if hydrate:
+        print(f"   Catalog: {report['matched_titles']} titles resolved, {len(warmer.missing)} missing from movies.db")
+        if args.missing_out and warmer.missing:
+            with open(args.missing_out, "w") as f:
+                f.write("\n".join(sorted(warmer.missing)) + "\n")
+            print(f"   Missing titles written to {args.missing_out}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate query-cache entries for popular queries.")
+    parser.add_argument("queries", nargs="*", help="Queries to warm")
+    parser.add_argument("--file", help="Text file with one query per line (# comments allowed)")
+    parser.add_argument("--archetypes", action="store_true", help="Also warm the archetype vocabulary (Sigma, Doomer...)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Max LLM calls in flight")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Max LLM calls started per second (0 = unlimited)")
+    parser.add_argument("--no-hydrate", action="store_true", help="Skip resolving titles against movies.db")
+    parser.add_argument("--missing-out", help="Write titles missing from movies.db to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import logging
+from typing import Iterable, List, Optional
+
+# Imported as `scripts.work_queue` or as plain `work_queue` by the loaders, like db.py.
+try:
+    from scripts.db import get_pool
+except ImportError:
+    from db import get_pool
+
+logger = logging.getLogger("WorkQueue")
+
+# --- CONFIG ---
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
+QUEUE_BACKOFF_BASE_SECONDS = float(os.getenv("QUEUE_BACKOFF_BASE_SECONDS", "30"))
+QUEUE_BACKOFF_MAX_SECONDS = float(os.getenv("QUEUE_BACKOFF_MAX_SECONDS", "3600"))
+
+# Job lifecycle: pending -> running -> generated (expensive result stored) -> done
+#                               \-> pending again after a backoff, or dead
+PENDING = "pending"
+RUNNING = "running"
+GENERATED = "generated"
+DONE = "done"
+DEAD = "dead"
+
+class WorkQueue:
+    """
+    Durable job table in a SQLite file, one row per integer job id.
+    claim() hands out due jobs atomically (BEGIN IMMEDIATE), fail() re-queues
+    with exponential backoff until max_attempts, then the job is dead and
+    shows up in the `<table>_dead_letter` view. store_result() persists an
+    expensive intermediate result so a restart resumes from it instead of
+    recomputing. done_sql() lets the caller mark completion inside its own
+    write transaction, so "done" and the written row commit together.
+    """
+    def __init__(self, db_path: str, table: str = "jobs", max_attempts: int = QUEUE_MAX_ATTEMPTS,
+                 backoff_base: float = QUEUE_BACKOFF_BASE_SECONDS, backoff_max: float = QUEUE_BACKOFF_MAX_SECONDS):
+        self.pool = get_pool(db_path, read_only=False)
+        self.table = table
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._ensure_schema()
+
+    def _conn(self):
+        return self.pool.connection()
+
+    def _ensure_schema(self):
+        conn = self._conn()
+        conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS {self.table} (
+            job_id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT '{PENDING}',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            result TEXT,
+            updated_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_{self.table}_due ON {self.table} (status, next_attempt_at);
+        CREATE VIEW IF NOT EXISTS {self.table}_dead_letter AS
+            SELECT job_id, attempts, last_error, datetime(updated_at, 'unixepoch') AS failed_at
+            FROM {self.table} WHERE status = '{DEAD}';
+        """)
+        conn.commit()
+
+    # --- FEEDING ---
+    def enqueue(self, job_ids: Iterable[int], status: str = PENDING) -> int:
+        """Adds new jobs; ids already in the table keep their state. Returns how many were new."""
+        conn = self._conn()
+        before = conn.total_changes
+        with conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {self.table} (job_id, status, updated_at) VALUES (?, ?, ?)",
+                [(int(job_id), status, time.time()) for job_id in job_ids],
+            )
+        return conn.total_changes - before
+
+    def enqueue_from(self, select_sql: str, status: str = PENDING) -> int:
+        """Like enqueue(), for the single id column of `select_sql` (no round trip through Python)."""
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(
+                f"INSERT OR IGNORE INTO {self.table} (job_id, status, updated_at) "
+                f"SELECT *, ?, ? FROM ({select_sql})", (status, time.time()))
+        return cur.rowcount
+
+    def recover(self) -> int:
+        """Puts jobs left 'running' by a crashed run back in line. Call once at startup."""
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(f"UPDATE {self.table} SET status = ?, updated_at = ? WHERE status = ?",
+                               (PENDING, time.time(), RUNNING))
+        return cur.rowcount
+
+    # --- WORKING ---
+    def claim(self, limit: int = 1) -> List[int]:
+        """Atomically moves up to `limit` due pending jobs to running and returns their ids."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")  # takes the write lock before reading, so no double claims
+        try:
+            ids = [row[0] for row in conn.execute(
+                f"SELECT job_id FROM {self.table} WHERE status = ? AND next_attempt_at <= ? "
+                f"ORDER BY next_attempt_at, job_id LIMIT ?", (PENDING, now, limit))]
+            if ids:
+                conn.executemany(
+                    f"UPDATE {self.table} SET status = ?, attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                    [(RUNNING, now, job_id) for job_id in ids])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return ids
+
+    def fail(self, job_id: int, error: str, permanent: bool = False) -> str:
+        """Records a failed attempt; returns the new status (pending with backoff, or dead)."""
+        conn = self._conn()
+        with conn:
+            row = conn.execute(f"SELECT attempts FROM {self.table} WHERE job_id = ?", (job_id,)).fetchone()
+            attempts = max(row[0] if row else 0, 1)
+            now = time.time()
+            if permanent or attempts >= self.max_attempts:
+                status, next_at = DEAD, now
+            else:
+                status = PENDING
+                next_at = now + min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+            conn.execute(
+                f"INSERT INTO {self.table} (job_id, status, attempts, last_error, next_attempt_at, updated_at) "
+                f"VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(job_id) DO UPDATE SET status = excluded.status, "
+                f"last_error = excluded.last_error, next_attempt_at = excluded.next_attempt_at, "
+                f"updated_at = excluded.updated_at",
+                (job_id, status, attempts, str(error)[:500], next_at, now))
+        if status == DEAD:
+            logger.warning(f"💀 Job {job_id} dead after {attempts} attempt(s): {error}")
+        return status
+
+    def store_result(self, job_id: int, result: dict):
+        """Commits an expensive intermediate result right away; the job becomes 'generated'."""
+        conn = self._conn()
+        with conn:
+            conn.execute(f"UPDATE {self.table} SET status = ?, result = ?, updated_at = ? WHERE job_id = ?",
+                         (GENERATED, json.dumps(result), time.time(), job_id))
+
+    def generated(self) -> List[dict]:
+        """Stored results whose final write never committed (e.g. the process died first)."""
+        rows = self._conn().execute(
+            f"SELECT result FROM {self.table} WHERE status = ? AND result IS NOT NULL", (GENERATED,))
+        return [json.loads(row[0]) for row in rows]
+
+    def done_sql(self) -> str:
+        """Statement (params: updated_at, job_id) to run in the same transaction as the final write."""
+        return f"UPDATE {self.table} SET status = '{DONE}', result = NULL, last_error = NULL, updated_at = ? WHERE job_id = ?"
+
+    def complete(self, job_id: int):
+        conn = self._conn()
+        with conn:
+            conn.execute(self.done_sql(), (time.time(), job_id))
+
+    # --- INSPECTION ---
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the earliest pending job is due (0 if one is due now), None if none are pending."""
+        row = self._conn().execute(
+            f"SELECT MIN(next_attempt_at) FROM {self.table} WHERE status = ?", (PENDING,)).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def dead_letters(self, limit: int = 100) -> List[dict]:
+        rows = self._conn().execute(f"SELECT * FROM {self.table}_dead_letter ORDER BY failed_at DESC LIMIT ?", (limit,))
+        return [dict(row) for row in rows]
+
+    def requeue_dead(self) -> int:
+        """Gives every dead job a fresh set of attempts (e.g. after fixing the cause)."""
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(
+                f"UPDATE {self.table} SET status = ?, attempts = 0, next_attempt_at = 0, updated_at = ? WHERE status = ?",
+                (PENDING, time.time(), DEAD))
+        return cur.rowcount
+
+    def counts(self) -> dict:
+        rows = self._conn().execute(f"SELECT status, COUNT(*) FROM {self.table} GROUP BY status")
+        counts = {PENDING: 0, RUNNING: 0, GENERATED: 0, DONE: 0, DEAD: 0}
+        counts.update({status: n for status, n in rows})
+        return counts
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+from scripts.db import BatchWriter, get_pool
+
+SCHEMA = """
+CREATE TABLE movies (movie_id INTEGER PRIMARY KEY, title TEXT, aesthetic TEXT);
+CREATE TABLE credits (movie_id INTEGER, person_id INTEGER, UNIQUE (movie_id, person_id));
+"""
+
+INSERT_MOVIE = "INSERT OR REPLACE INTO movies (movie_id, title) VALUES (?, ?)"
+INSERT_CREDIT = "INSERT OR IGNORE INTO credits (movie_id, person_id) VALUES (?, ?)"
+UPDATE_MOVIE = "UPDATE movies SET aesthetic = ? WHERE movie_id = ?"
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "movies.db")
+    conn = get_pool(path, read_only=False).connection()
+    conn.executescript(SCHEMA)
+    conn.commit()
+    return path
+
+def rows(db_path, sql):
+    return [tuple(row) for row in get_pool(db_path, read_only=False).connection().execute(sql)]
+
+@pytest.mark.parametrize("flush_rows", [2, 3, 5, 6, 7])
+def test_statements_keep_insertion_order_across_flushes(db_path, flush_rows):
+    # Same shape as batch_loader: INSERT, credits, then UPDATE per film (4 rows),
+    # with flushes landing at different points inside a film.
+    writer = BatchWriter(db_path, flush_rows=flush_rows, flush_seconds=60)
+    for movie_id in range(1, 8):
+        writer.add(INSERT_MOVIE, (movie_id, f"Film {movie_id}"))
+        writer.add_many(INSERT_CREDIT, [(movie_id, 100), (movie_id, 101)])
+        writer.add(UPDATE_MOVIE, (f"look {movie_id}", movie_id))
+    writer.close()
+
+    assert writer.stats()["flushes"] > 1
+    assert rows(db_path, "SELECT movie_id, aesthetic FROM movies ORDER BY movie_id") == [
+        (movie_id, f"look {movie_id}") for movie_id in range(1, 8)
+    ]
+    assert rows(db_path, "SELECT COUNT(*) FROM credits") == [(14,)]
+
+def test_add_group_is_never_split_by_a_flush(db_path):
+    writer = BatchWriter(db_path, flush_rows=3, flush_seconds=60)
+    flushed = []
+    flush = writer.flush
+    writer.flush = lambda: flushed.append(writer.stats()["pending"]) or flush()
+    for movie_id in range(1, 6):
+        writer.add_group([
+            (INSERT_MOVIE, (movie_id, f"Film {movie_id}")),
+            (UPDATE_MOVIE, ("done", movie_id)),
+        ])
+    writer.close()
+
+    assert flushed and all(pending % 2 == 0 for pending in flushed)
+    assert rows(db_path, "SELECT COUNT(*) FROM movies WHERE aesthetic = 'done'") == [(5,)]
+
+def test_failed_flush_rolls_back_the_whole_batch(db_path):
+    writer = BatchWriter(db_path, flush_rows=100, flush_seconds=60)
+    writer.add(INSERT_MOVIE, (1, "Film 1"))
+    writer.add("INSERT INTO no_such_table VALUES (?)", (1,))
+    with pytest.raises(sqlite3.Error):
+        writer.flush()
+    writer.close()
+
+    assert rows(db_path, "SELECT COUNT(*) FROM movies") == [(0,)]
+    assert writer.stats()["rows_failed"] == 2
+
+def test_closed_writer_rejects_rows(db_path):
+    writer = BatchWriter(db_path)
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.add(INSERT_MOVIE, (1, "Film 1"))
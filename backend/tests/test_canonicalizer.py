@@ -0,0 +1,37 @@
+import pytest
+
+from scripts.canonicalizer import QueryCanonicalizer
+
+@pytest.fixture
+def canonicalize():
+    return QueryCanonicalizer().canonicalize
+
+@pytest.mark.parametrize("a, b", [
+    ("sigma grindset movies", "sigma grindset films"),
+    ("sigma grindset movies", "sigma grind set"),
+    ("heist movies please", "heist movie"),
+    ("cozy witches", "cozy witch"),
+])
+def test_same_request_same_key(canonicalize, a, b):
+    assert canonicalize(a) == canonicalize(b)
+
+@pytest.mark.parametrize("a, b", [
+    ("love without romance", "romance without love"),
+    ("dog eat dog", "eat dog"),
+    ("news movies", "new movies"),
+    ("about time", "time"),
+    ("the truman show", "truman"),
+    ("fight club", "night club"),
+    ("aliens", "alien"),
+])
+def test_different_requests_different_keys(canonicalize, a, b):
+    assert canonicalize(a) != canonicalize(b)
+
+def test_only_filler_keeps_the_query(canonicalize):
+    assert canonicalize("movies") == "movies"
+
+def test_key_is_stateless():
+    first, second = QueryCanonicalizer(), QueryCanonicalizer()
+    for query in ("sigma grind set", "cozy rainy day films"):
+        first.canonicalize(query)
+    assert first.canonicalize("cozy rainy day") == second.canonicalize("cozy rainy day") == "cozy rainy day"
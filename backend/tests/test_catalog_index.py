@@ -0,0 +1,82 @@
+import sys
+import threading
+
+import pytest
+
+from scripts.db import CatalogIndex, get_pool, normalize_title
+
+SCHEMA = "CREATE TABLE movies (title TEXT, year INTEGER, poster_url TEXT, director TEXT);"
+
+def fill(db_path, prefix, count):
+    conn = get_pool(db_path, read_only=False).connection()
+    with conn:
+        conn.execute("DELETE FROM movies")
+        conn.executemany(
+            "INSERT INTO movies (title, year, poster_url, director) VALUES (?, ?, ?, ?)",
+            [(f"{prefix} Film {i}", 1950 + i, f"/{prefix}/{i}.jpg", prefix) for i in range(count)])
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "movies.db")
+    conn = get_pool(path, read_only=False).connection()
+    conn.executescript(SCHEMA)
+    conn.commit()
+    return path
+
+def test_lookups(db_path):
+    fill(db_path, "Alpha", 5)
+    index = CatalogIndex(db_path)
+    assert not index.is_loaded
+    assert index.load() == 5
+
+    assert index.find("alpha  film 2")["year"] == 1952
+    assert index.find("Alpha Film 2", 1953)["year"] == 1952   # within YEAR_TOLERANCE
+    assert index.find("Alpha Film 2", 1960) is None
+    assert index.find_simple("Alpha Film 3") == {"title": "Alpha Film 3", "year": 1953, "poster_url": "/Alpha/3.jpg"}
+    assert index.find_many([("Alpha Film 1", None), ("Nope", None)])[1] is None
+    assert index.stats()["version"] == 1
+
+def test_reload_under_concurrent_reads_never_mixes_versions(db_path):
+    # Every film of a build comes from one director, so a row that pairs a
+    # title from one build with data from the other shows up as a mismatch.
+    builds = [("Alpha", 60), ("Beta", 15)]
+    fill(db_path, *builds[0])
+    index = CatalogIndex(db_path)
+    index.load()
+
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        try:
+            while not stop.is_set():
+                for prefix, count in builds:
+                    for i in range(0, count, 7):
+                        title = f"{prefix} Film {i}"
+                        for row in (index.find(title), index.find(title, 1950 + i), index.find_fuzzy(title)):
+                            if row is not None and (normalize_title(row["title"]) != normalize_title(title)
+                                                    or row["director"] != prefix):
+                                errors.append((title, row))
+                        simple = index.find_simple(title)
+                        if simple is not None and simple["title"] != title:
+                            errors.append((title, simple))
+        except Exception as e:  # IndexError etc. from a half-swapped index
+            errors.append(e)
+
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    try:
+        for t in readers:
+            t.start()
+        for n in range(40):
+            fill(db_path, *builds[(n + 1) % 2])
+            index.load()
+    finally:
+        stop.set()
+        for t in readers:
+            t.join()
+        sys.setswitchinterval(switch)
+
+    assert errors == []
+    assert index.version == 41
@@ -0,0 +1,79 @@
+import pytest
+
+from scripts import circuit_breaker
+from scripts.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+def make_breaker(**kwargs):
+    options = dict(window=10, min_calls=4, failure_rate=0.5, slow_call_seconds=5, open_seconds=30, half_open_probes=1)
+    options.update(kwargs)
+    return CircuitBreaker("test-model", **options)
+
+def test_opens_once_bad_share_reaches_the_rate(clock):
+    breaker = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED          # below min_calls: no verdict yet
+    breaker.record_success(latency=0.2)
+    assert breaker.state == OPEN            # 3 bad of 4
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+def test_slow_successes_count_as_bad(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_success(latency=6)
+    assert breaker.state == OPEN
+
+def test_half_open_probe_success_closes(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow()                  # the one probe
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()              # probe slot taken
+    breaker.record_success(latency=0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.times_opened == 2
+    assert not breaker.allow()
+
+def test_release_frees_a_probe_without_a_verdict(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow()
+    breaker.release()                       # hedge loser cancelled
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+def test_late_results_while_open_are_ignored(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    breaker.record_success(latency=0.1)
+    assert breaker.state == OPEN
+    assert breaker.stats()["recent_calls"] == 0
@@ -0,0 +1,36 @@
+import pytest
+from thefuzz import process
+
+from scripts.fuzzy import TrigramIndex
+
+CATALOG = [
+    "the godfather", "the godfather part ii", "heat", "in the heat of the night",
+    "the matrix", "the matrix reloaded", "blade runner", "blade runner 2049",
+    "inception", "interstellar", "the truman show", "about time", "alien", "aliens",
+    "spirited away", "the grand budapest hotel", "eternal sunshine of the spotless mind",
+    "mad max fury road", "no country for old men", "there will be blood",
+]
+
+@pytest.fixture(scope="module")
+def index():
+    return TrigramIndex().build(CATALOG)
+
+def old_extract_one(query):
+    """The full-table scan the index replaced: process.extractOne, kept at score >= 90."""
+    match, score = process.extractOne(query, CATALOG)
+    return match if score >= 90 else None
+
+@pytest.mark.parametrize("query", [
+    "godfather", "the godfathr", "godfather part 2", "matrix", "the matrix reloded",
+    "blade runer", "interstelar", "grand budapest hotel", "eternal sunshine",
+    "mad max", "spirited away", "no country for old man", "zzz qqq",
+])
+def test_matches_the_old_scanner(index, query):
+    hits = index.search(query)
+    best = CATALOG[hits[0][0]] if hits else None
+    assert best == old_extract_one(query)
+
+def test_scores_are_sorted_and_above_threshold(index):
+    hits = index.search("the matrix")
+    assert hits and all(score >= 90 for _, score in hits)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
@@ -0,0 +1,22 @@
+from scripts import negative_cache
+from scripts.negative_cache import NegativeCache, FLAGGED, FAILURE
+
+def test_flagged_and_failure_entries(monkeypatch):
+    monkeypatch.setattr(negative_cache, "FAILURE_BACKOFF_BASE_SECONDS", 5)
+    cache = NegativeCache()
+    cache.record_flagged("bad")
+    assert cache.check("bad") == FLAGGED
+
+    assert cache.record_failure("flaky") == 5
+    assert cache.record_failure("flaky") == 10   # exponential per key
+    assert cache.check("flaky") == FAILURE
+    cache.clear("flaky")
+    assert cache.check("flaky") is None
+    assert cache.stats()["recorded"] == {FLAGGED: 1, FAILURE: 2}
+
+def test_bounded_oldest_out_first():
+    cache = NegativeCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.record_flagged(key)
+    assert cache.check("a") is None
+    assert cache.check("b") == cache.check("c") == FLAGGED
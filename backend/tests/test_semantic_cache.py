@@ -0,0 +1,37 @@
+from scripts.semantic_cache import HashingEmbedder, SemanticIndex
+
+def make_index(max_entries=100):
+    return SemanticIndex(embedder=HashingEmbedder(), threshold=0.5, max_entries=max_entries)
+
+def test_nearest_finds_a_rewording():
+    index = make_index()
+    index.add_many(["lonely neon city nights", "cozy rainy day mystery"])
+    match, score = index.nearest("lonely neon nights in the city")
+    assert match == "lonely neon city nights" and score >= 0.5
+    assert index.nearest("lonely neon city nights") is None  # itself is not a neighbour
+
+def test_index_is_bounded_and_evicts_least_recently_used():
+    index = make_index(max_entries=3)
+    index.add_many(["space opera epic", "haunted house horror", "heist caper comedy"])
+    assert index.nearest("space opera epics")[0] == "space opera epic"   # touch: now most recent
+    index.add("courtroom drama")                                            # evicts "haunted house horror"
+
+    assert index.stats()["entries"] == 3 and index.stats()["rows"] == 3
+    assert index.stats()["evictions"] == 1
+    assert index.nearest("haunted house horrors") is None
+    assert index.nearest("space opera epics")[0] == "space opera epic"
+
+def test_matrix_never_outgrows_max_entries():
+    index = make_index(max_entries=50)
+    for i in range(500):
+        index.add(f"query number {i} about things")
+    assert index.stats()["entries"] == 50
+    assert index._matrix.shape[0] == 50
+
+def test_removed_rows_are_reused():
+    index = make_index()
+    index.add_many(["space opera epic", "haunted house horror"])
+    index.remove("space opera epic")
+    index.add("courtroom drama")
+    assert index.stats()["rows"] == 2
+    assert index.nearest("space opera epics") is None
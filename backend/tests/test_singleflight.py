@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scripts.singleflight import AsyncSingleFlight, SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow(value):
+        calls.append(value)
+        started.set()
+        time.sleep(0.2)
+        return value * 2
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", slow, 21)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flights.do("k", slow, 21))) for _ in range(4)]
+    for t in followers:
+        t.start()
+    for t in [leader, *followers]:
+        t.join()
+
+    assert calls == [21]
+    assert results == [42] * 5
+    stats = flights.stats()
+    assert stats["leaders"] == 1 and stats["coalesced_waiters"] == 4
+    assert stats["in_flight"] == 0 and stats["waiting_now"] == 0
+
+def test_exception_reaches_every_waiter_and_key_is_released():
+    flights = SingleFlight()
+    started = threading.Event()
+
+    def boom():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("upstream down")
+
+    errors = []
+    def call():
+        try:
+            flights.do("k", boom)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait()
+    threads.append(threading.Thread(target=call))
+    threads[1].start()
+    for t in threads:
+        t.join()
+
+    assert errors == ["upstream down"] * 2
+    assert flights.do("k", lambda: "fresh") == "fresh"   # failure is not remembered
+
+def test_async_waiter_cancellation_does_not_cancel_the_shared_call():
+    async def scenario():
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "titles"
+
+        leader = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        quitter = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        quitter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await quitter
+        assert await leader == "titles"
+        assert await flights.do("k", work) == "titles"
+        return calls, flights.stats()
+
+    calls, stats = asyncio.run(scenario())
+    assert calls == [1, 1]   # one shared call, then a new one once the first finished
+    assert stats["leaders"] == 2 and stats["coalesced_waiters"] == 1 and stats["waiting_now"] == 0
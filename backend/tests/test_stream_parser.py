@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from scripts.stream_parser import TitleStreamParser
+
+TITLES = [
+    {"title": "Heat", "year": 1995, "confidence_score": 92},
+    {"title": "Say \"Anything\" {or} [nothing]", "year": 1989, "confidence_score": 80},
+    {"title": "Ocean's Eleven", "year": 2001, "confidence_score": 75, "tags": ["heist", {"tone": "fun"}]},
+]
+
+def feed_in_chunks(text, size):
+    parser = TitleStreamParser()
+    out = []
+    for i in range(0, len(text), size):
+        out.extend(parser.feed(text[i:i + size]))
+    return out, parser
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 1000])
+def test_any_chunking_yields_the_same_titles(size):
+    text = json.dumps({"titles": TITLES})
+    out, parser = feed_in_chunks(text, size)
+    assert out == TITLES
+    assert parser.emitted == len(TITLES)
+
+def test_titles_arrive_as_soon_as_they_close():
+    parser = TitleStreamParser()
+    assert parser.feed('{"titles": [{"title": "Heat", "year": 1995}, {"title": "Ro') == [{"title": "Heat", "year": 1995}]
+    assert parser.feed('nin", "year": 1998}') == [{"title": "Ronin", "year": 1998}]
+    assert parser.feed("]}") == []
+
+def test_prose_fence_and_bare_array():
+    text = 'Sure! Here you go:\n```json\n[{"title": "Heat", "year": 1995}]\n```'
+    out, _ = feed_in_chunks(text, 4)
+    assert out == [{"title": "Heat", "year": 1995}]
+
+def test_lenient_objects_are_repaired():
+    out, _ = feed_in_chunks('{"titles": [{"title": "Heat", "year": 1995,}]}', 5)
+    assert out == [{"title": "Heat", "year": 1995}]
+
+def test_objects_outside_the_titles_array_are_ignored():
+    text = '{"meta": {"model": "x"}, "titles": [{"title": "Heat"}], "usage": {"tokens": 3}}'
+    out, _ = feed_in_chunks(text, 3)
+    assert out == [{"title": "Heat"}]
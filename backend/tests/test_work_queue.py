@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from scripts.work_queue import DEAD, DONE, GENERATED, PENDING, RUNNING, WorkQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "jobs.db"), table="test_jobs", max_attempts=3, backoff_base=0, backoff_max=0)
+
+def test_enqueue_is_idempotent(queue):
+    assert queue.enqueue([1, 2, 3]) == 3
+    assert queue.enqueue([2, 3, 4]) == 1
+    assert queue.counts()[PENDING] == 4
+
+def test_concurrent_claims_never_hand_out_a_job_twice(queue):
+    queue.enqueue(range(200))
+    claimed, lock = [], threading.Lock()
+
+    def worker():
+        while True:
+            ids = queue.claim(limit=7)
+            if not ids:
+                return
+            with lock:
+                claimed.extend(ids)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(claimed) == list(range(200))
+    assert queue.counts()[RUNNING] == 200
+
+def test_failures_back_off_then_go_dead(tmp_path):
+    queue = WorkQueue(str(tmp_path / "jobs.db"), table="test_jobs", max_attempts=2,
+                      backoff_base=60, backoff_max=60)
+    queue.enqueue([7])
+    assert queue.claim() == [7]
+    assert queue.fail(7, "timeout") == PENDING
+    assert queue.claim() == []                  # backing off
+    assert 0 < queue.next_due_in() <= 60
+
+    assert queue.requeue_dead() == 0             # not dead yet
+    conn = queue._conn()
+    with conn:                                   # skip the wait
+        conn.execute("UPDATE test_jobs SET next_attempt_at = 0")
+    assert queue.claim() == [7]
+    assert queue.fail(7, "timeout again") == DEAD
+
+    [letter] = queue.dead_letters()
+    assert letter["job_id"] == 7 and letter["attempts"] == 2 and letter["last_error"] == "timeout again"
+    assert queue.requeue_dead() == 1
+    assert queue.claim() == [7]
+
+def test_permanent_failure_is_dead_at_once(queue):
+    queue.enqueue([1])
+    queue.claim()
+    assert queue.fail(1, "404", permanent=True) == DEAD
+
+def test_stored_result_survives_a_crash_until_done(queue):
+    queue.enqueue([1, 2])
+    queue.claim(limit=2)
+    queue.store_result(1, {"tmdb_id": 1, "vibe": "cozy"})
+    # Crash: job 2 was still running, job 1 had its expensive result stored
+    assert queue.recover() == 1
+    assert queue.counts()[PENDING] == 1 and queue.counts()[GENERATED] == 1
+    assert queue.generated() == [{"tmdb_id": 1, "vibe": "cozy"}]
+
+    conn = queue._conn()
+    with conn:
+        conn.execute(queue.done_sql(), (0, 1))
+    assert queue.counts()[DONE] == 1
+    assert queue.generated() == []